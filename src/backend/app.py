@@ -5,13 +5,20 @@ Version 3.0 - Bug Fixes, Security Enhancements, Performance Optimizations
 """
 
 import os
+import io
 import tempfile
 import subprocess
 import hashlib
 import logging
-import traceback
+import logging.handlers
+import importlib.util
+import queue
+import atexit
 import time
 import signal
+import math
+import re
+import secrets
 import threading
 import mimetypes
 import platform
@@ -20,12 +27,15 @@ from pathlib import Path
 import zipfile
 import shutil
 import json
-from functools import wraps
+from functools import wraps, lru_cache
 from contextlib import contextmanager
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict, Counter
+from itertools import islice
+import bisect
 from threading import Lock
 
 # Configuration Management
@@ -39,14 +49,22 @@ class Config:
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv('RATE_LIMIT_PER_MINUTE', 20))
     RATE_LIMIT_PER_HOUR: int = int(os.getenv('RATE_LIMIT_PER_HOUR', 100))
+    TEMP_DIR: str = os.getenv('TEMP_DIR', 'temp')  # Point at tmpfs to keep upload spooling off disk
+    # Only behind a proxy that honours X-Sendfile (Apache mod_xsendfile, lighttpd); gunicorn alone
+    # already sendfile()s FileWrapper bodies, and without such a proxy clients get an empty body
+    USE_X_SENDFILE: bool = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    MEMORY_CACHE_MB: int = int(os.getenv('MEMORY_CACHE_MB', 256))  # Per-process in-memory tier; 0 disables
+    IMAGE_MAX_DIMENSION: int = int(os.getenv('IMAGE_MAX_DIMENSION', 0))  # Default image bound for /compress-image and /batch-process; 0 keeps full size
 
 config = Config()
 
 # Rate limiting implementation
 class RateLimiter:
+    LOCK_STRIPES = 64
+    
     def __init__(self):
-        self.requests = defaultdict(deque)
-        self.lock = Lock()
+        self.buckets = {}  # (client_ip, endpoint) -> (tokens, last_refill)
+        self.locks = [Lock() for _ in range(self.LOCK_STRIPES)]
         self.limits = {
             'default': (config.RATE_LIMIT_PER_HOUR, 3600),  # Per hour
             'pdf_convert': (10, 60),  # 10 PDF conversions per minute  
@@ -57,84 +75,104 @@ class RateLimiter:
     def is_allowed(self, client_ip: str, endpoint: str = 'default') -> tuple:
         """Check if request is allowed and return rate limit info"""
         limit_count, limit_window = self.limits.get(endpoint, self.limits['default'])
+        refill_rate = limit_count / limit_window  # Tokens per second
         now = time.time()
-        key = f"{client_ip}:{endpoint}"
+        key = (client_ip, endpoint)
         
-        with self.lock:
-            # Clean old requests
-            while (self.requests[key] and 
-                   self.requests[key][0] < now - limit_window):
-                self.requests[key].popleft()
-            
-            current_count = len(self.requests[key])
+        with self.locks[hash(key) % self.LOCK_STRIPES]:
+            # Refill lazily for the time elapsed since this bucket was last touched
+            tokens, last_refill = self.buckets.get(key, (limit_count, now))
+            tokens = min(limit_count, tokens + (now - last_refill) * refill_rate)
             
-            if current_count >= limit_count:
+            if tokens < 1:
                 # Rate limit exceeded
-                oldest_request = self.requests[key][0] if self.requests[key] else now
-                reset_time = oldest_request + limit_window
+                self.buckets[key] = (tokens, now)
+                retry_after = math.ceil((1 - tokens) / refill_rate)
                 return False, {
                     'limit': limit_count,
                     'remaining': 0,
-                    'reset': int(reset_time),
-                    'retry_after': int(reset_time - now)
+                    'reset': int(now + retry_after),
+                    'retry_after': retry_after
                 }
             
             # Allow request
-            self.requests[key].append(now)
+            tokens -= 1
+            self.buckets[key] = (tokens, now)
             return True, {
                 'limit': limit_count,
-                'remaining': limit_count - current_count - 1,
-                'reset': int(now + limit_window),
+                'remaining': int(tokens),
+                'reset': int(now + (limit_count - tokens) / refill_rate),
                 'retry_after': 0
             }
+    
+    def evict_idle(self):
+        """Drop buckets idle long enough to have refilled completely; they equal a fresh bucket"""
+        now = time.time()
+        removed = 0
+        for key, (_, last_refill) in list(self.buckets.items()):
+            limit_window = self.limits.get(key[1], self.limits['default'])[1]
+            if now - last_refill < limit_window:
+                continue
+            with self.locks[hash(key) % self.LOCK_STRIPES]:
+                bucket = self.buckets.get(key)
+                if bucket and now - bucket[1] >= limit_window:
+                    del self.buckets[key]
+                    removed += 1
+        return removed
 
 # Request monitoring
+@dataclass(slots=True)
+class RequestRecord:
+    """One monitored request; slotted to avoid a dict per request"""
+    endpoint: str
+    method: str
+    status_code: int
+    duration_ms: float
+    client_ip: str
+    user_agent: str = None
+
 class RequestMonitor:
     def __init__(self):
         self.requests = deque(maxlen=1000)  # Keep last 1000 requests
+        self.timestamps = deque(maxlen=1000)  # Parallel, ascending epoch nanoseconds for bisect
         self.lock = Lock()
     
     def log_request(self, endpoint: str, method: str, status_code: int, 
                    duration: float, client_ip: str, user_agent: str = None):
         """Log request details for monitoring"""
-        request_data = {
-            'timestamp': datetime.now().isoformat(),
-            'endpoint': endpoint,
-            'method': method,
-            'status_code': status_code,
-            'duration_ms': round(duration * 1000, 2),
-            'client_ip': client_ip,
-            'user_agent': user_agent[:100] if user_agent else None
-        }
+        request_data = RequestRecord(
+            endpoint, method, status_code, duration * 1000,
+            client_ip, user_agent[:100] if user_agent else None
+        )
         
         with self.lock:
+            # Stamped under the lock so timestamps stay sorted across threads
+            self.timestamps.append(time.time_ns())
             self.requests.append(request_data)
     
     def get_stats(self, hours: int = 1) -> dict:
         """Get request statistics for the last N hours"""
-        cutoff = datetime.now() - timedelta(hours=hours)
+        cutoff_ns = time.time_ns() - hours * 3600 * 1_000_000_000
         
         with self.lock:
-            recent_requests = [
-                req for req in self.requests
-                if datetime.fromisoformat(req['timestamp']) > cutoff
-            ]
+            start = bisect.bisect_right(self.timestamps, cutoff_ns)
+            recent_requests = list(islice(self.requests, start, None))
         
         if not recent_requests:
             return {'total_requests': 0, 'period_hours': hours}
         
         # Calculate statistics
         total_requests = len(recent_requests)
-        avg_duration = sum(req['duration_ms'] for req in recent_requests) / total_requests
+        avg_duration = sum(req.duration_ms for req in recent_requests) / total_requests
         
         status_codes = defaultdict(int)
         endpoints = defaultdict(int)
         methods = defaultdict(int)
         
         for req in recent_requests:
-            status_codes[req['status_code']] += 1
-            endpoints[req['endpoint']] += 1
-            methods[req['method']] += 1
+            status_codes[req.status_code] += 1
+            endpoints[req.endpoint] += 1
+            methods[req.method] += 1
         
         return {
             'total_requests': total_requests,
@@ -147,33 +185,106 @@ class RequestMonitor:
         }
 
 # Enhanced logging setup
+# Request threads only enqueue records; a listener thread does the console/file I/O
+log_formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(name)s - [%(funcName)s:%(lineno)d] - %(message)s'
+)
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(log_formatter)
+log_file_handler = logging.handlers.RotatingFileHandler(  # File logging for debugging
+    'app.log', mode='a', maxBytes=10 * 1024 * 1024, backupCount=5
+)
+log_file_handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(
+    log_queue, log_stream_handler, log_file_handler, respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)  # Flush queued records on shutdown
+
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+log_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Full format is applied by the listener
+
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(name)s - [%(funcName)s:%(lineno)d] - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log', mode='a')  # File logging for debugging
-    ]
+    handlers=[log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
+def init_worker_logging():
+    """Process pool initializer: forked workers have no listener thread, so log straight to stderr"""
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    worker_handler = logging.StreamHandler()
+    worker_handler.setFormatter(log_formatter)
+    root_logger.addHandler(worker_handler)
+
 # Security configurations using Config
 MAX_FILE_SIZE = config.MAX_FILE_SIZE
 MAX_MEMORY_USAGE = config.MAX_MEMORY_USAGE
 MAX_CONCURRENT_OPERATIONS = config.MAX_CONCURRENT_OPERATIONS
 ALLOWED_MIME_TYPES = {
-    'application/pdf': ['.pdf'],
-    'image/jpeg': ['.jpg', '.jpeg'],
-    'image/png': ['.png'],
-    'image/webp': ['.webp'],
-    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ['.docx']
+    'application/pdf': frozenset({'.pdf'}),
+    'image/jpeg': frozenset({'.jpg', '.jpeg'}),
+    'image/png': frozenset({'.png'}),
+    'image/webp': frozenset({'.webp'}),
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': frozenset({'.docx'})
+}
+
+# Extension sets accepted per endpoint
+PDF_EXTENSIONS = frozenset({'.pdf'})
+JPEG_EXTENSIONS = frozenset({'.jpg', '.jpeg'})
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff'})
+BATCH_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+# Outputs whose payload is already deflated/entropy-coded; ZIP stores them as-is
+PRECOMPRESSED_EXTENSIONS = frozenset({'.pdf', '.jpg', '.jpeg', '.png', '.webp'})
+
+# Leading magic bytes per extension; WebP (RIFF....WEBP) is checked separately
+FILE_SIGNATURES = {
+    '.pdf': (b'%PDF-',),
+    '.jpg': (b'\xff\xd8\xff',),
+    '.jpeg': (b'\xff\xd8\xff',),
+    '.png': (b'\x89PNG\r\n\x1a\n',),
+    '.bmp': (b'BM',),
+    '.tiff': (b'II*\x00', b'MM\x00*'),
+    '.docx': (b'PK\x03\x04',),
 }
 
 # Enhanced error tracking with rate limiting
-error_counts = {}
-last_errors = []
 MAX_ERROR_HISTORY = 200
-operation_semaphore = threading.Semaphore(MAX_CONCURRENT_OPERATIONS)
+MAX_ERROR_KEYS = 10000
+error_counts = OrderedDict()  # LRU of (type, ip) counters so scanners can't grow it forever
+last_errors = deque(maxlen=MAX_ERROR_HISTORY)
+error_type_counts = Counter()  # Types of the errors currently in last_errors, kept in step with it
+errors_tracked_total = 0
+error_lock = Lock()
+
+class OperationLimiter:
+    """Non-blocking cap on concurrent heavy operations that also exposes the in-flight count"""
+    
+    def __init__(self, max_operations):
+        self.max_operations = max_operations
+        self.in_flight = 0  # Plain int reads are safe for metrics without taking the lock
+        self.lock = Lock()
+    
+    def try_acquire(self):
+        with self.lock:
+            if self.in_flight >= self.max_operations:
+                return False
+            self.in_flight += 1
+            return True
+    
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+    
+    @property
+    def available(self):
+        return self.max_operations - self.in_flight
+
+operation_limiter = OperationLimiter(MAX_CONCURRENT_OPERATIONS)
 
 # Try to import optional dependencies with fallbacks
 try:
@@ -192,12 +303,33 @@ except ImportError:
     PSUTIL_AVAILABLE = False
     logger.warning("❌ psutil not available, resource monitoring disabled")
 
+try:
+    import blake3  # SIMD tree hash for cache keys
+    BLAKE3_AVAILABLE = True
+    logger.info("✅ blake3 loaded successfully")
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    logger.warning("❌ blake3 not available, using hashlib for cache keys")
+
+UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+MAX_FILENAME_LENGTH = 100
+
 class SecurityValidator:
     """Enhanced security validation for file uploads"""
     
     @staticmethod
     def validate_file_signature(file_content, expected_extension):
         """Validate file using magic bytes"""
+        # Known types only need a few header bytes; libmagic's rule walk is the fallback
+        if expected_extension == '.webp':
+            if file_content[:4] == b'RIFF' and file_content[8:12] == b'WEBP':
+                return True, "Valid file"
+            return False, f"File content doesn't match extension {expected_extension}"
+        if expected_extension in FILE_SIGNATURES:
+            if file_content.startswith(FILE_SIGNATURES[expected_extension]):
+                return True, "Valid file"
+            return False, f"File content doesn't match extension {expected_extension}"
+        
         if not MAGIC_AVAILABLE:
             return True, "Magic bytes validation not available"
             
@@ -217,18 +349,16 @@ class SecurityValidator:
     @staticmethod
     def sanitize_filename(filename):
         """Enhanced filename sanitization"""
-        import re
-        
         # Remove path components
         filename = os.path.basename(filename)
         
         # Replace dangerous characters
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        filename = UNSAFE_FILENAME_CHARS.sub('_', filename)
         
         # Limit length
-        if len(filename) > 100:
+        if len(filename) > MAX_FILENAME_LENGTH:
             name, ext = os.path.splitext(filename)
-            filename = name[:95] + ext
+            filename = name[:MAX_FILENAME_LENGTH - 5] + ext
         
         # Prevent hidden files
         if filename.startswith('.'):
@@ -239,6 +369,30 @@ class SecurityValidator:
 class ResourceMonitor:
     """Monitor system resources and prevent overload"""
     
+    SAMPLE_INTERVAL = 2.0
+    
+    # Latest background samples; None until the sampler's first pass completes
+    cpu_percent = None
+    memory = None
+    disk = None
+    
+    @classmethod
+    def sample_forever(cls):
+        """Background sampler: cpu_percent(interval) blocks, so only this thread ever waits on it"""
+        while True:
+            try:
+                cls.memory = psutil.virtual_memory()
+                cls.disk = psutil.disk_usage('/')
+                cls.cpu_percent = psutil.cpu_percent(interval=cls.SAMPLE_INTERVAL)
+            except Exception as e:
+                logger.warning(f"Resource sampling failed: {e}")
+                time.sleep(cls.SAMPLE_INTERVAL)
+    
+    @classmethod
+    def start_sampler(cls):
+        if PSUTIL_AVAILABLE:
+            threading.Thread(target=cls.sample_forever, name="resource-sampler", daemon=True).start()
+    
     @staticmethod
     def check_system_health():
         """Check if system can handle new operations"""
@@ -246,9 +400,9 @@ class ResourceMonitor:
             return True, "Resource monitoring not available"
             
         try:
-            memory = psutil.virtual_memory()
-            cpu_percent = psutil.cpu_percent(interval=1)
-            disk = psutil.disk_usage('/')
+            memory = ResourceMonitor.memory or psutil.virtual_memory()
+            cpu_percent = ResourceMonitor.cpu_percent
+            disk = ResourceMonitor.disk or psutil.disk_usage('/')
             
             # Check memory usage
             if memory.percent > MAX_MEMORY_USAGE:
@@ -258,8 +412,8 @@ class ResourceMonitor:
             if disk.free < 1024**3:
                 return False, f"Low disk space: {disk.free / 1024**3:.1f}GB"
             
-            # Check CPU usage
-            if cpu_percent > 90:
+            # Check CPU usage (skipped until the first sample lands)
+            if cpu_percent is not None and cpu_percent > 90:
                 return False, f"High CPU usage: {cpu_percent}%"
             
             return True, "System healthy"
@@ -268,34 +422,48 @@ class ResourceMonitor:
             logger.warning(f"Resource check failed: {e}")
             return True, "Could not check resources"
 
+ResourceMonitor.start_sampler()
+
 def track_error(error_type, error_msg, user_ip="unknown"):
     """Enhanced error tracking with rate limiting"""
-    global error_counts, last_errors
-    
+    global errors_tracked_total
     current_time = datetime.now()
-    error_key = f"{error_type}_{user_ip}"
-    
-    # Rate limiting: max 10 errors per minute per IP
-    recent_errors = [e for e in last_errors 
-                    if e.get('ip') == user_ip and 
-                    datetime.fromisoformat(e['timestamp']) > current_time - timedelta(minutes=1)]
-    
-    if len(recent_errors) > 10:
-        logger.warning(f"Rate limit exceeded for IP {user_ip}")
-        return False
-    
-    error_counts[error_key] = error_counts.get(error_key, 0) + 1
-    error_entry = {
-        'timestamp': current_time.isoformat(),
-        'type': error_type,
-        'message': str(error_msg),
-        'ip': user_ip,
-        'count': error_counts[error_key]
-    }
-    
-    last_errors.append(error_entry)
-    if len(last_errors) > MAX_ERROR_HISTORY:
-        last_errors.pop(0)
+    error_key = (error_type, user_ip)
+    # ISO timestamps of one format order lexically, so no per-entry parsing is needed
+    cutoff = (current_time - timedelta(minutes=1)).isoformat()
+    
+    with error_lock:
+        # Rate limiting: max 10 errors per minute per IP; history is chronological, so stop at the cutoff
+        recent_count = 0
+        for e in reversed(last_errors):
+            if e['timestamp'] <= cutoff:
+                break
+            if e['ip'] == user_ip:
+                recent_count += 1
+                if recent_count > 10:
+                    logger.warning(f"Rate limit exceeded for IP {user_ip}")
+                    return False
+        
+        count = error_counts.pop(error_key, 0) + 1
+        error_counts[error_key] = count
+        if len(error_counts) > MAX_ERROR_KEYS:
+            error_counts.popitem(last=False)
+        
+        if len(last_errors) == last_errors.maxlen:
+            evicted_type = last_errors[0]['type']
+            error_type_counts[evicted_type] -= 1
+            if not error_type_counts[evicted_type]:
+                del error_type_counts[evicted_type]
+        error_type_counts[error_type] += 1
+        errors_tracked_total += 1
+        
+        last_errors.append({
+            'timestamp': current_time.isoformat(),
+            'type': error_type,
+            'message': str(error_msg),
+            'ip': user_ip,
+            'count': count
+        })
     
     logger.error(f"Error tracked: {error_type} - {error_msg} (IP: {user_ip})")
     return True
@@ -304,13 +472,11 @@ def enhanced_error_handler(func):
     """Production-ready error handling with monitoring"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        from flask import request
         user_ip = request.remote_addr if hasattr(request, 'remote_addr') else 'unknown'
         
         # Check system health before processing
         healthy, health_msg = ResourceMonitor.check_system_health()
         if not healthy:
-            from flask import jsonify
             return jsonify({
                 "error": "System overloaded",
                 "code": "SYSTEM_OVERLOAD",
@@ -318,9 +484,8 @@ def enhanced_error_handler(func):
                 "retry_after": 60
             }), 503
         
-        # Acquire semaphore for concurrency control
-        if not operation_semaphore.acquire(blocking=False):
-            from flask import jsonify
+        # Reserve a slot for concurrency control
+        if not operation_limiter.try_acquire():
             return jsonify({
                 "error": "Server busy",
                 "code": "TOO_MANY_REQUESTS",
@@ -332,7 +497,6 @@ def enhanced_error_handler(func):
             return func(*args, **kwargs)
         except MemoryError as e:
             track_error("MEMORY_ERROR", str(e), user_ip)
-            from flask import jsonify
             return jsonify({
                 "error": "Insufficient memory",
                 "code": "MEMORY_ERROR",
@@ -341,7 +505,6 @@ def enhanced_error_handler(func):
             }), 507
         except subprocess.TimeoutExpired as e:
             track_error("TIMEOUT_ERROR", str(e), user_ip)
-            from flask import jsonify
             return jsonify({
                 "error": "Operation timed out",
                 "code": "TIMEOUT_ERROR", 
@@ -350,7 +513,6 @@ def enhanced_error_handler(func):
             }), 408
         except FileNotFoundError as e:
             track_error("FILE_NOT_FOUND", str(e), user_ip)
-            from flask import jsonify
             return jsonify({
                 "error": "Required system tool not found",
                 "code": "TOOL_MISSING",
@@ -359,7 +521,6 @@ def enhanced_error_handler(func):
             }), 500
         except PermissionError as e:
             track_error("PERMISSION_ERROR", str(e), user_ip)
-            from flask import jsonify
             return jsonify({
                 "error": "Permission denied",
                 "code": "PERMISSION_ERROR",
@@ -367,9 +528,7 @@ def enhanced_error_handler(func):
             }), 403
         except Exception as e:
             track_error("UNKNOWN_ERROR", str(e), user_ip)
-            logger.error(f"Unexpected error in {func.__name__}: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            from flask import jsonify
+            logger.error(f"Unexpected error in {func.__name__}: {e}", exc_info=True)
             return jsonify({
                 "error": "Internal server error",
                 "code": "INTERNAL_ERROR",
@@ -378,15 +537,36 @@ def enhanced_error_handler(func):
                 "function": func.__name__
             }), 500
         finally:
-            operation_semaphore.release()
+            operation_limiter.release()
     
     return wrapper
 
-def validate_file_size_streaming(file_stream, max_size):
-    """Better file size validation with streaming to prevent memory issues"""
+def validate_file_size_streaming(file_stream, max_size, hasher=None):
+    """
+    Better file size validation with streaming to prevent memory issues.
+    If a hasher is given it is fed every chunk, so the cache hash comes from the same pass.
+    Seekable streams are sized with seek/tell first, so oversized uploads are rejected
+    without reading them and size-only checks never read at all.
+    """
     total_size = 0
-    chunk_size = 8192
+    chunk_size = 64 * 1024
     original_position = file_stream.tell()
+    
+    try:
+        file_stream.seek(0, os.SEEK_END)
+        total_size = file_stream.tell()
+    except (OSError, io.UnsupportedOperation):
+        total_size = None
+    
+    if total_size is not None:
+        if total_size > max_size:
+            file_stream.seek(original_position)
+            raise ValueError(f"File too large: {total_size} bytes > {max_size} bytes")
+        if hasher is None:
+            file_stream.seek(0)
+            return total_size
+    
+    total_size = 0
     file_stream.seek(0)
     
     try:
@@ -397,6 +577,8 @@ def validate_file_size_streaming(file_stream, max_size):
             total_size += len(chunk)
             if total_size > max_size:
                 raise ValueError(f"File too large: {total_size} bytes > {max_size} bytes")
+            if hasher is not None:
+                hasher.update(chunk)
         
         file_stream.seek(0)
         return total_size
@@ -416,6 +598,89 @@ def validate_quality_param(quality_str, default=85):
         logger.warning(f"Invalid quality format '{quality_str}', using default {default}")
         return default
 
+def send_bytes(data, download_name, mimetype):
+    """
+    Send an in-memory payload as an attachment in a single write.
+    send_file(io.BytesIO(data)) would stream it back out in 8 KiB FileWrapper reads.
+    """
+    response = Response(data, mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    response.cache_control.no_cache = True
+    return response
+
+class ZipChunkSink(io.RawIOBase):
+    """Write-only, unseekable ZipFile target; stream_zip drains it as entries are written"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def stream_zip(entries):
+    """
+    Yield a ZIP archive of (path, arcname, compress_type) entries while it's being built.
+    ZipFile falls back to data descriptors on an unseekable target, so nothing is staged on disk.
+    """
+    sink = ZipChunkSink()
+    with zipfile.ZipFile(sink, 'w') as zipf:
+        for path, arcname, compress_type in entries:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = compress_type
+            with open(path, 'rb') as src, zipf.open(zinfo, 'w') as dst:
+                while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                    dst.write(chunk)
+                    if data := sink.drain():
+                        yield data
+    yield sink.drain()
+
+def output_size(path):
+    """Size of a converter's output file, 0 if it was never written; one stat instead of exists() + stat()"""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+def send_cached_file(cached_file, download_name, mimetype):
+    """
+    Send a cache entry as an attachment. Cache entries outlive the request, so with
+    USE_X_SENDFILE the proxy can stream them itself (temp files must keep using send_file).
+    """
+    return werkzeug_send_file(
+        Path(cached_file).resolve(),
+        request.environ,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name,
+        use_x_sendfile=config.USE_X_SENDFILE,
+        response_class=app.response_class
+    )
+
+def send_cache_hit(cached_file, download_name, mimetype):
+    """
+    Response for a cache entry, or None on a miss. Entries that fit the in-memory
+    tier are served from (and promoted into) memory_cache; larger ones stream from disk.
+    """
+    data = memory_cache.get(cached_file.name)
+    if data is None:
+        try:
+            if not memory_cache.fits(cached_file.stat().st_size):
+                return send_cached_file(cached_file, download_name, mimetype)
+            data = cached_file.read_bytes()
+        except FileNotFoundError:
+            return None
+        memory_cache.put(cached_file.name, data)
+    return send_bytes(data, download_name, mimetype)
+
 @contextmanager
 def temp_file_manager(*file_paths):
     """Context manager for better temp file cleanup"""
@@ -430,8 +695,13 @@ def temp_file_manager(*file_paths):
             except Exception as e:
                 logger.warning(f"Cleanup failed for {file_path}: {e}")
 
-def validate_file_upload(file, allowed_extensions, max_size_mb=100):
-    """Enhanced file validation with security checks and streaming validation"""
+VALIDATION_CHUNK_SIZE = 64 * 1024
+
+def validate_file_upload(file, allowed_extensions, max_size_mb=100, hasher=None):
+    """
+    Enhanced file validation with security checks and streaming validation.
+    Returns (safe_filename, file_size, header, digest); digest is None without a hasher.
+    """
     if not file or file.filename == '':
         raise ValueError("No file provided")
     
@@ -443,38 +713,84 @@ def validate_file_upload(file, allowed_extensions, max_size_mb=100):
     # Check file extension
     file_ext = Path(safe_filename).suffix.lower()
     if file_ext not in allowed_extensions:
-        raise ValueError(f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}")
+        raise ValueError(f"Unsupported file type. Allowed: {', '.join(sorted(allowed_extensions))}")
     
-    # Use streaming validation for file size
+    # Size check first: seekable uploads are measured without being read
     max_size_bytes = max_size_mb * 1024 * 1024
     try:
         file_size = validate_file_size_streaming(file, max_size_bytes)
     except ValueError as e:
         raise ValueError(f"File validation failed: {str(e)}")
     
-    if file_size == 0:
-        raise ValueError("File is empty")
-    
-    # Read first part for magic bytes validation
-    file_start = file.read(8192)
+    # Single pass: the first chunk doubles as the magic-bytes header, every chunk feeds the hasher
     file.seek(0)
+    first_chunk = file.read(VALIDATION_CHUNK_SIZE)
+    if not first_chunk:
+        raise ValueError("File is empty")
     
-    # Validate file signature
-    is_valid, validation_msg = SecurityValidator.validate_file_signature(file_start, file_ext)
+    # Validate file signature before hashing the rest, so garbage fails fast
+    header = first_chunk[:8192]
+    is_valid, validation_msg = SecurityValidator.validate_file_signature(header, file_ext)
     if not is_valid:
+        file.seek(0)
         raise ValueError(f"Security validation failed: {validation_msg}")
     
-    return safe_filename
+    digest = None
+    if hasher is not None:
+        hasher.update(first_chunk)
+        for chunk in iter(lambda: file.read(VALIDATION_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    file.seek(0)
+    
+    return safe_filename, file_size, header, digest
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def spool_upload_to_disk(file, suffix, max_size_mb=100, signature=None):
+    """
+    Stream an upload into a temp file in fixed-size chunks, hashing as it goes.
+    Returns (temp_path, file_hash, file_size); the caller owns temp_path.
+    """
+    max_size_bytes = max_size_mb * 1024 * 1024
+    hasher = CacheManager.new_file_hasher()
+    total_size = 0
+    
+    file.stream.seek(0)
+    temp_file = tempfile.NamedTemporaryFile(dir=TEMP_DIR, suffix=suffix, delete=False)
+    temp_path = Path(temp_file.name)
+    
+    try:
+        with temp_file:
+            while True:
+                chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if total_size == 0 and signature and not chunk.startswith(signature):
+                    raise ValueError("Security validation failed: file signature does not match extension")
+                total_size += len(chunk)
+                if total_size > max_size_bytes:
+                    raise ValueError(f"File too large: more than {max_size_bytes} bytes")
+                hasher.update(chunk)
+                temp_file.write(chunk)
+        
+        if total_size == 0:
+            raise ValueError("File is empty")
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    
+    return temp_path, hasher.hexdigest(), total_size
 
 # Flask and web framework imports
-from flask import Flask, request, jsonify, send_file, after_this_request, make_response, g
+from flask import Flask, Response, request, jsonify, send_file, after_this_request, make_response, g
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, send_file as werkzeug_send_file
 from werkzeug.exceptions import RequestEntityTooLarge
 
 # All PDF and image processing imports with error handling
 try:
-    from PIL import Image, ImageOps
+    from PIL import Image
     PIL_AVAILABLE = True
     logger.info("✅ PIL/Pillow loaded successfully")
 except ImportError:
@@ -482,37 +798,94 @@ except ImportError:
     logger.warning("❌ PIL/Pillow not available")
 
 try:
-    from pdf2docx import Converter
-    PDF2DOCX_AVAILABLE = True
-    logger.info("✅ pdf2docx loaded successfully")
+    import mozjpeg_lossless_optimization  # Trellis/Huffman re-optimization of JPEG output
+    MOZJPEG_AVAILABLE = True
+    logger.info("✅ mozjpeg-lossless-optimization loaded successfully")
+except ImportError:
+    MOZJPEG_AVAILABLE = False
+    logger.warning("❌ mozjpeg-lossless-optimization not available, using Pillow JPEG output")
+
+try:
+    import oxipng  # pyoxipng: lossless PNG re-optimization without a decode/encode round trip
+    OXIPNG_AVAILABLE = True
+    logger.info("✅ oxipng loaded successfully")
 except ImportError:
-    PDF2DOCX_AVAILABLE = False
+    OXIPNG_AVAILABLE = False
+    logger.warning("❌ oxipng not available, using Pillow PNG output")
+
+try:
+    import pyvips  # libvips: tile-streaming decode/resize/encode for JPEG and WebP
+    PYVIPS_AVAILABLE = True
+    logger.info("✅ pyvips loaded successfully")
+except (ImportError, OSError):  # OSError: binding present but libvips itself missing
+    PYVIPS_AVAILABLE = False
+    logger.warning("❌ pyvips not available, using Pillow for JPEG/WebP encoding")
+
+# pdf2docx drags in a whole layout engine but only ever runs inside pool workers,
+# so probe for it here and let the worker import it on first conversion
+PDF2DOCX_AVAILABLE = importlib.util.find_spec('pdf2docx') is not None
+if PDF2DOCX_AVAILABLE:
+    logger.info("✅ pdf2docx found (imported on first use)")
+else:
     logger.warning("❌ pdf2docx not available")
 
 try:
     import fitz  # PyMuPDF
+    fitz.TOOLS.mupdf_display_errors(False)  # Don't format/print MuPDF warnings on every page
     PYMUPDF_AVAILABLE = True
     logger.info("✅ PyMuPDF loaded successfully")
 except ImportError:
     PYMUPDF_AVAILABLE = False
     logger.warning("❌ PyMuPDF not available")
 
-try:
-    import pikepdf
-    PIKEPDF_AVAILABLE = True
-    logger.info("✅ pikepdf loaded successfully")
-except ImportError:
-    PIKEPDF_AVAILABLE = False
+# Only reported as a capability, so there is no need to pay for the import
+PIKEPDF_AVAILABLE = importlib.util.find_spec('pikepdf') is not None
+if PIKEPDF_AVAILABLE:
+    logger.info("✅ pikepdf found")
+else:
     logger.warning("❌ pikepdf not available")
 
 try:
     from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.shared import Inches
+    from lxml import etree
     PYTHON_DOCX_AVAILABLE = True
     logger.info("✅ python-docx loaded successfully")
 except ImportError:
     PYTHON_DOCX_AVAILABLE = False
     logger.warning("❌ python-docx not available")
 
+def warm_up_libraries():
+    """Pay MuPDF, python-docx and Pillow first-use costs at worker boot, not on the first request"""
+    start_time = time.time()
+    
+    if PYMUPDF_AVAILABLE:
+        try:
+            doc = fitz.open()
+            page = doc.new_page()
+            page.insert_text((72, 72), "warm-up")
+            page.get_text("blocks")
+            doc.tobytes()
+            doc.close()
+        except Exception as e:
+            logger.warning(f"PyMuPDF warm-up failed: {e}")
+    
+    if PYTHON_DOCX_AVAILABLE:
+        try:
+            Document().save(io.BytesIO())
+        except Exception as e:
+            logger.warning(f"python-docx warm-up failed: {e}")
+    
+    if PIL_AVAILABLE:
+        Image.init()  # Register every format plugin now instead of lazily on first open
+    
+    logger.info(f"🔥 Library warm-up finished in {(time.time() - start_time) * 1000:.0f}ms")
+
+# Runs at import so gunicorn workers (which never reach __main__) start warm
+warm_up_libraries()
+
 # Initialize Flask app with enhanced configuration
 app = Flask(__name__)
 app.config.update({
@@ -528,7 +901,7 @@ rate_limiter = RateLimiter()
 request_monitor = RequestMonitor()
 
 # Track application start time for uptime metrics
-app.start_time = time.time()
+APP_START = time.monotonic()  # Immune to wall-clock jumps
 
 def rate_limit(endpoint: str = 'default'):
     """Rate limiting decorator"""
@@ -567,6 +940,9 @@ def rate_limit(endpoint: str = 'default'):
 @app.before_request
 def before_request():
     """Set request start time for monitoring"""
+    # CORS preflights are answered by flask-cors and never reach a view; keep them out of the monitor
+    if request.method == 'OPTIONS':
+        return
     g.start_time = time.time()
 
 @app.after_request  
@@ -600,48 +976,218 @@ CORS(app,
      ],
      methods=['GET', 'POST', 'OPTIONS'],
      allow_headers=['Content-Type', 'Authorization'],
-     max_age=3600
+     max_age=86400  # Let browsers reuse a preflight for a day
 )
 
 # Create directories with proper permissions
 CACHE_DIR = Path("cache")
-TEMP_DIR = Path("temp")
+TEMP_DIR = Path(config.TEMP_DIR)
 UPLOADS_DIR = Path("uploads")
 
-for directory in [CACHE_DIR, TEMP_DIR, UPLOADS_DIR]:
-    directory.mkdir(mode=0o755, exist_ok=True)
+# Warm starts only stat; exist_ok still covers workers racing to create them
+for directory in (CACHE_DIR, TEMP_DIR, UPLOADS_DIR):
+    if not directory.is_dir():
+        directory.mkdir(mode=0o755, parents=True, exist_ok=True)
+
+def cpu_has_sha_extensions():
+    """SHA-256 is hardware accelerated on CPUs with SHA-NI (x86) or the ARMv8 crypto extensions"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                # x86 lists 'sha_ni' under flags; ARM lists 'sha2' under Features, and the crypto
+                # extensions are optional there (the Raspberry Pi 4's Cortex-A72 lacks them)
+                if line.startswith('flags'):
+                    return 'sha_ni' in line.split()
+                if line.startswith('Features'):
+                    return 'sha2' in line.split()
+    except OSError:
+        # No /proc (macOS, Windows): every Apple Silicon and Windows-on-ARM CPU has them
+        return platform.machine().lower() in ('arm64', 'aarch64')
+    return False
+
+# Cache keys only need to be stable per host, so hash with whichever is fastest here:
+# BLAKE3's SIMD kernels beat everything when installed; otherwise OpenSSL's SHA-NI
+# SHA-256 beats BLAKE2b ~2x, but BLAKE2b wins ~2x on plain x86
+if BLAKE3_AVAILABLE:
+    CACHE_HASH_ALGORITHM = 'blake3'
+elif cpu_has_sha_extensions():
+    CACHE_HASH_ALGORITHM = 'sha256'
+else:
+    CACHE_HASH_ALGORITHM = 'blake2b'
+logger.info(f"🔑 Cache hash: {CACHE_HASH_ALGORITHM}")
+CACHE_SALT = os.environ.get('CACHE_SALT', 'default-salt').encode()
+
+def remove_files_older_than(directory, max_age_seconds):
+    """
+    Delete regular files in directory whose mtime is older than max_age_seconds.
+    os.scandir's DirEntry caches the file type from the directory read and the stat result,
+    so each file costs at most one stat instead of Path.glob's is_file() + stat().
+    """
+    cutoff = time.time() - max_age_seconds
+    removed_count = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed_count += 1
+            except FileNotFoundError:
+                continue  # Removed concurrently (e.g. request cleanup)
+    return removed_count
+
+def summarize_directory(directory):
+    """Return (file_count, total_bytes) for the regular files in directory, in one scandir pass"""
+    file_count = 0
+    total_size = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    total_size += entry.stat(follow_symlinks=False).st_size
+                    file_count += 1
+            except OSError:
+                continue  # Removed concurrently or unreadable; one entry shouldn't void the summary
+    return file_count, total_size
+
+def remove_all_files(directory):
+    """
+    Delete every regular file in directory; returns (removed_count, freed_bytes).
+    Where supported, unlinks relative to an open directory fd so each call skips path resolution.
+    """
+    removed_count = 0
+    freed_space = 0
+    dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY) if os.unlink in os.supports_dir_fd else None
+    try:
+        with os.scandir(dir_fd if dir_fd is not None else directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        size = entry.stat(follow_symlinks=False).st_size
+                        if dir_fd is not None:
+                            os.unlink(entry.name, dir_fd=dir_fd)
+                        else:
+                            os.unlink(entry.path)
+                        freed_space += size
+                        removed_count += 1
+                except FileNotFoundError:
+                    continue
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    return removed_count, freed_space
+
+def clear_directories(directories):
+    """Background half of /clear-cache: unlink everything and log what was actually removed"""
+    removed_files = 0
+    freed_space = 0
+    for directory in directories:
+        try:
+            count, size = remove_all_files(directory)
+            removed_files += count
+            freed_space += size
+        except OSError as e:
+            logger.error(f"Cache clear error in {directory}: {e}")
+    logger.info(f"Cache cleared: {removed_files} files, {freed_space / (1024**2):.1f}MB freed")
+
+# In-memory tier in front of CACHE_DIR
+class BytesLRU:
+    """Per-process LRU of cache entry bytes, bounded by total size"""
+    
+    def __init__(self, max_bytes, max_item_bytes):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = Lock()
+    
+    def fits(self, size):
+        return 0 < size <= self.max_item_bytes
+    
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+            return data
+    
+    def put(self, key, data):
+        if not self.fits(len(data)):
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self.entries[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'size_mb': round(self.total_bytes / (1024**2), 2)}
+
+# Entries are keyed by content hash + settings, so a copy outliving its file in another worker is still correct
+memory_cache = BytesLRU(config.MEMORY_CACHE_MB * 1024 * 1024, config.MEMORY_CACHE_MB * 1024 * 1024 // 8)
 
 # Cache management
 class CacheManager:
     """Enhanced cache management with cleanup and size limits"""
     
     @staticmethod
-    def get_file_hash(file_content):
-        """Generate SHA256 hash with salt"""
-        salt = os.environ.get('CACHE_SALT', 'default-salt')
-        return hashlib.sha256(salt.encode() + file_content).hexdigest()
+    def new_file_hasher():
+        """Salted incremental hasher for cache keys (BLAKE3, SHA-256 or BLAKE2b, see CACHE_HASH_ALGORITHM)"""
+        if CACHE_HASH_ALGORITHM == 'blake3':
+            return blake3.blake3(CACHE_SALT)
+        if CACHE_HASH_ALGORITHM == 'sha256':
+            return hashlib.sha256(CACHE_SALT)
+        # BLAKE2b takes the salt as a native key (max 64 bytes) instead of a hashed prefix
+        return hashlib.blake2b(key=CACHE_SALT[:64], digest_size=32)
+    
+    @staticmethod
+    def staging_path(cached_file):
+        """Per-writer temp path beside a cache entry; os.replace() it into place once complete"""
+        return cached_file.with_name(f".{cached_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    
+    @staticmethod
+    def store(cached_file, data):
+        """Write a cache entry atomically so concurrent readers never see a partial file"""
+        temp_path = CacheManager.staging_path(cached_file)
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, cached_file)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        memory_cache.put(cached_file.name, data)
+    
+    @staticmethod
+    def adopt(temp_path, cached_file):
+        """
+        Move a finished temp file into the cache: a rename when TEMP_DIR shares the filesystem,
+        otherwise (e.g. TEMP_DIR on tmpfs) copy beside the entry and rename, so readers never see a partial file
+        """
+        try:
+            os.replace(temp_path, cached_file)
+        except OSError:
+            staging_file = CacheManager.staging_path(cached_file)
+            shutil.copyfile(temp_path, staging_file)
+            os.replace(staging_file, cached_file)
+            Path(temp_path).unlink(missing_ok=True)
     
     @staticmethod
     def cleanup_old_cache(max_age_hours=24):
         """Remove old cache files"""
         try:
-            current_time = time.time()
-            removed_count = 0
-            
-            for cache_file in CACHE_DIR.glob('*'):
-                if cache_file.is_file():
-                    file_age = current_time - cache_file.stat().st_mtime
-                    if file_age > max_age_hours * 3600:
-                        cache_file.unlink()
-                        removed_count += 1
+            removed_count = remove_files_older_than(CACHE_DIR, max_age_hours * 3600)
             
             # Also clean temp directory
-            for temp_file in TEMP_DIR.glob('*'):
-                if temp_file.is_file():
-                    file_age = current_time - temp_file.stat().st_mtime
-                    if file_age > 3600:  # Remove temp files older than 1 hour
-                        temp_file.unlink()
-                        removed_count += 1
+            removed_count += remove_files_older_than(TEMP_DIR, 3600)  # Remove temp files older than 1 hour
             
             if removed_count > 0:
                 logger.info(f"Cleaned up {removed_count} old cache/temp files")
@@ -653,18 +1199,16 @@ class CacheManager:
     def get_cache_stats():
         """Get cache directory statistics"""
         try:
-            cache_files = list(CACHE_DIR.glob('*'))
-            temp_files = list(TEMP_DIR.glob('*'))
-            
-            cache_size = sum(f.stat().st_size for f in cache_files if f.is_file())
-            temp_size = sum(f.stat().st_size for f in temp_files if f.is_file())
+            cache_files, cache_size = summarize_directory(CACHE_DIR)
+            temp_files, temp_size = summarize_directory(TEMP_DIR)
             
             return {
-                'cache_files': len(cache_files),
-                'temp_files': len(temp_files),
+                'cache_files': cache_files,
+                'temp_files': temp_files,
                 'cache_size_mb': round(cache_size / (1024**2), 2),
                 'temp_size_mb': round(temp_size / (1024**2), 2),
-                'total_size_mb': round((cache_size + temp_size) / (1024**2), 2)
+                'total_size_mb': round((cache_size + temp_size) / (1024**2), 2),
+                'memory_cache': memory_cache.stats()
             }
         except Exception as e:
             logger.warning(f"Cache stats error: {e}")
@@ -674,15 +1218,7 @@ class CacheManager:
 def cleanup_temp_files(max_age_hours=1):
     """Clean up temporary files older than specified hours"""
     try:
-        current_time = time.time()
-        removed_count = 0
-        
-        for temp_file in TEMP_DIR.glob('*'):
-            if temp_file.is_file():
-                file_age = current_time - temp_file.stat().st_mtime
-                if file_age > max_age_hours * 3600:
-                    temp_file.unlink()
-                    removed_count += 1
+        removed_count = remove_files_older_than(TEMP_DIR, max_age_hours * 3600)
         
         if removed_count > 0:
             logger.info(f"Cleaned up {removed_count} temporary files")
@@ -693,52 +1229,64 @@ def cleanup_temp_files(max_age_hours=1):
         return 0
 
 # System capability detection with better error handling
-def check_system_tools():
-    """Comprehensive system tool detection"""
-    tools = {}
-    
-    # Check Ghostscript
-    gs_paths = [
-        r'C:\Program Files\gs\gs10.05.1\bin\gswin64c.exe',
-        r'C:\Program Files\gs\gs9.56.1\bin\gswin64c.exe',
-        'gs', 'gswin64c', 'gswin32c'
-    ]
-    
-    for path in gs_paths:
-        try:
-            result = subprocess.run([path, '--version'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                tools['ghostscript'] = {
-                    'available': True,
-                    'path': path,
-                    'version': result.stdout.strip().split('\n')[0] if result.stdout else 'Unknown'
-                }
-                break
-        except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
+GHOSTSCRIPT_CANDIDATES = [
+    r'C:\Program Files\gs\gs10.05.1\bin\gswin64c.exe',
+    r'C:\Program Files\gs\gs9.56.1\bin\gswin64c.exe',
+    'gs', 'gswin64c', 'gswin32c'
+]
+LIBREOFFICE_CANDIDATES = ['libreoffice', 'soffice']
+SYSTEM_TOOLS_CACHE = CACHE_DIR / '.system_tools.json'
+
+def tool_fingerprint(candidates):
+    """Resolved path and mtime of each candidate binary; changes when a tool is installed or upgraded"""
+    fingerprint = {}
+    for candidate in candidates:
+        resolved = shutil.which(candidate)
+        fingerprint[candidate] = [resolved, os.stat(resolved).st_mtime if resolved else None]
+    return fingerprint
+
+def probe_tool(candidates, timeout, first_line_only):
+    """Run `<tool> --version` for the first candidate that resolves and answers"""
+    for path in candidates:
+        # Skip the fork/exec entirely for binaries that aren't there
+        if not shutil.which(path):
             continue
-    
-    if 'ghostscript' not in tools:
-        tools['ghostscript'] = {'available': False, 'path': None, 'version': None}
-    
-    # Check LibreOffice
-    libreoffice_paths = ['libreoffice', 'soffice']
-    for path in libreoffice_paths:
         try:
             result = subprocess.run([path, '--version'], 
-                                  capture_output=True, text=True, timeout=10)
+                                  capture_output=True, text=True, timeout=timeout)
             if result.returncode == 0:
-                tools['libreoffice'] = {
-                    'available': True,
-                    'path': path,
-                    'version': result.stdout.strip()
-                }
-                break
+                version = result.stdout.strip()
+                if first_line_only:
+                    version = version.split('\n')[0] if version else 'Unknown'
+                return {'available': True, 'path': path, 'version': version}
         except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
             continue
+    return {'available': False, 'path': None, 'version': None}
+
+@lru_cache(maxsize=1)
+def check_system_tools():
+    """Comprehensive system tool detection, cached on disk until a binary changes"""
+    fingerprint = tool_fingerprint(GHOSTSCRIPT_CANDIDATES + LIBREOFFICE_CANDIDATES)
+    try:
+        cached = json.loads(SYSTEM_TOOLS_CACHE.read_text())
+        if cached.get('fingerprint') == fingerprint:
+            return cached['tools']
+    except (OSError, ValueError):
+        pass
+    
+    # The two probes are independent; LibreOffice in particular is slow to start
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ghostscript = executor.submit(probe_tool, GHOSTSCRIPT_CANDIDATES, 5, True)
+        libreoffice = executor.submit(probe_tool, LIBREOFFICE_CANDIDATES, 10, False)
+        tools = {
+            'ghostscript': ghostscript.result(),
+            'libreoffice': libreoffice.result()
+        }
     
-    if 'libreoffice' not in tools:
-        tools['libreoffice'] = {'available': False, 'path': None, 'version': None}
+    try:
+        SYSTEM_TOOLS_CACHE.write_text(json.dumps({'fingerprint': fingerprint, 'tools': tools}))
+    except OSError as e:
+        logger.warning(f"Could not cache system tool detection: {e}")
     
     return tools
 
@@ -753,6 +1301,7 @@ def background_cleanup():
         try:
             time.sleep(3600)  # Run every hour
             CacheManager.cleanup_old_cache()
+            rate_limiter.evict_idle()
         except Exception as e:
             logger.error(f"Background cleanup error: {e}")
 
@@ -777,7 +1326,7 @@ def health_check():
             "system_health": {
                 "healthy": system_health[0],
                 "message": system_health[1],
-                "concurrent_operations": MAX_CONCURRENT_OPERATIONS - operation_semaphore._value,
+                "concurrent_operations": operation_limiter.in_flight,
                 "max_concurrent": MAX_CONCURRENT_OPERATIONS
             },
             "capabilities": {
@@ -797,6 +1346,9 @@ def health_check():
                 "pikepdf": PIKEPDF_AVAILABLE,
                 "python_docx": PYTHON_DOCX_AVAILABLE,
                 "pillow": PIL_AVAILABLE,
+                "mozjpeg": MOZJPEG_AVAILABLE,
+                "oxipng": OXIPNG_AVAILABLE,
+                "pyvips": PYVIPS_AVAILABLE,
                 "psutil": PSUTIL_AVAILABLE,
                 "magic": MAGIC_AVAILABLE
             },
@@ -842,7 +1394,7 @@ def readiness_check():
         # Check disk space
         if PSUTIL_AVAILABLE:
             try:
-                disk = psutil.disk_usage('/')
+                disk = ResourceMonitor.disk or psutil.disk_usage('/')
                 free_gb = disk.free / (1024**3)
                 if free_gb < 1:  # Less than 1GB
                     return jsonify({
@@ -855,7 +1407,7 @@ def readiness_check():
         # Check memory usage
         if PSUTIL_AVAILABLE:
             try:
-                memory = psutil.virtual_memory()
+                memory = ResourceMonitor.memory or psutil.virtual_memory()
                 if memory.percent > 95:  # Very high memory usage
                     return jsonify({
                         "status": "not ready",
@@ -898,7 +1450,7 @@ def liveness_check():
         return jsonify({
             "status": "alive",
             "timestamp": datetime.now().isoformat(),
-            "uptime_seconds": time.time() - app.start_time if hasattr(app, 'start_time') else 0
+            "uptime_seconds": time.monotonic() - APP_START
         })
     except Exception as e:
         logger.error(f"Liveness check error: {e}")
@@ -907,37 +1459,95 @@ def liveness_check():
             "error": str(e)
         }), 500
 
-# Enhanced endpoint for system statistics
-@app.route('/stats', methods=['GET'])
-@enhanced_error_handler
-def get_system_stats():
-    """Enhanced system statistics for monitoring"""
-    stats = {
-        "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0",
-        "system": {
-            "platform": platform.system(),
-            "python_version": platform.python_version(),
-            "architecture": platform.architecture()[0]
-        },
-        "libraries": {
-            "pymupdf": PYMUPDF_AVAILABLE,
-            "pdf2docx": PDF2DOCX_AVAILABLE,
-            "pillow": PIL_AVAILABLE,
-            "psutil": PSUTIL_AVAILABLE,
-            "magic": MAGIC_AVAILABLE
-        },
-        "cache": CacheManager.get_cache_stats(),
-        "concurrent_operations": MAX_CONCURRENT_OPERATIONS - operation_semaphore._value,
-        "max_concurrent_operations": MAX_CONCURRENT_OPERATIONS
-    }
+# Constant for the life of the process; platform.architecture() can shell out to `file`
+PLATFORM_INFO = {
+    "platform": platform.system(),
+    "python_version": platform.python_version(),
+    "architecture": platform.architecture()[0]
+}
+
+LIBRARY_STATUS = {
+    "pymupdf": PYMUPDF_AVAILABLE,
+    "pdf2docx": PDF2DOCX_AVAILABLE,
+    "pillow": PIL_AVAILABLE,
+    "psutil": PSUTIL_AVAILABLE,
+    "magic": MAGIC_AVAILABLE
+}
+
+STATS_TTL_SECONDS = 2.0
+
+def ttl_cached(ttl_seconds):
+    """Memoise a zero-argument function for ttl_seconds; concurrent callers share one refresh"""
+    def decorator(func):
+        lock = Lock()
+        state = {'expires': 0.0, 'value': None}
+        
+        @wraps(func)
+        def wrapper():
+            with lock:
+                now = time.monotonic()
+                if now >= state['expires']:
+                    state['value'] = func()
+                    state['expires'] = now + ttl_seconds
+                return state['value']
+        return wrapper
+    return decorator
+
+# Container layers and RAM-backed mounts say nothing about real disk headroom
+PSEUDO_FILESYSTEMS = frozenset({'overlay', 'squashfs', 'tmpfs'})
+
+@ttl_cached(60)
+def list_disk_partitions():
+    """(mountpoint, fstype) of physical partitions; mounts rarely change, so refresh once a minute"""
+    return [(partition.mountpoint, partition.fstype)
+            for partition in psutil.disk_partitions(all=False)
+            if partition.fstype not in PSEUDO_FILESYSTEMS]
+
+@ttl_cached(10)
+def count_process_handles():
+    """
+    (open_files, sockets) for this process from one walk of /proc/self/fd.
+    psutil's connections() cross-references every socket on the host via /proc/net/*.
+    """
+    fd_dir = '/proc/self/fd'
+    if not os.path.isdir(fd_dir):
+        current_process = psutil.Process()
+        return len(current_process.open_files()), len(current_process.connections())
+    
+    open_files = 0
+    sockets = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            target = os.readlink(os.path.join(fd_dir, fd))
+        except OSError:
+            continue  # Closed since listdir (including listdir's own fd)
+        if target.startswith('socket:'):
+            sockets += 1
+        elif target.startswith('/') and os.path.isfile(target):
+            open_files += 1
+    return open_files, sockets
+
+def partition_usage(mountpoint):
+    """(total, used, free) bytes for a mountpoint; statvfs directly, psutil where it is missing (Windows)"""
+    if not hasattr(os, 'statvfs'):
+        usage = psutil.disk_usage(mountpoint)
+        return usage.total, usage.used, usage.free
+    usage = os.statvfs(mountpoint)
+    return (usage.f_blocks * usage.f_frsize,
+            (usage.f_blocks - usage.f_bfree) * usage.f_frsize,
+            usage.f_bavail * usage.f_frsize)
+
+@ttl_cached(STATS_TTL_SECONDS)
+def collect_resource_stats():
+    """Memory, CPU, disk and process sections of /stats; scrapers hitting it back to back reuse one sample"""
+    resource_stats = {}
     
     # Add system resource stats if available
     if PSUTIL_AVAILABLE:
         try:
             # Memory information
-            memory = psutil.virtual_memory()
-            stats["memory"] = {
+            memory = ResourceMonitor.memory or psutil.virtual_memory()
+            resource_stats["memory"] = {
                 "total_gb": round(memory.total / (1024**3), 2),
                 "available_gb": round(memory.available / (1024**3), 2),
                 "used_percent": memory.percent,
@@ -945,60 +1555,82 @@ def get_system_stats():
             }
             
             # CPU information
-            stats["cpu"] = {
+            resource_stats["cpu"] = {
                 "count": psutil.cpu_count(),
-                "usage_percent": psutil.cpu_percent(interval=1),
+                "usage_percent": ResourceMonitor.cpu_percent,
                 "load_average": list(psutil.getloadavg()) if hasattr(psutil, 'getloadavg') else None
             }
             
-            # Disk information for multiple mount points
-            stats["disk"] = {}
-            for partition in psutil.disk_partitions():
+            # Disk information for multiple mount points (one statvfs each)
+            resource_stats["disk"] = {}
+            for mountpoint, fstype in list_disk_partitions():
                 try:
-                    partition_usage = psutil.disk_usage(partition.mountpoint)
-                    stats["disk"][partition.mountpoint] = {
-                        "total_gb": round(partition_usage.total / (1024**3), 2),
-                        "free_gb": round(partition_usage.free / (1024**3), 2),
-                        "used_percent": round((partition_usage.used / partition_usage.total) * 100, 1),
-                        "filesystem": partition.fstype
-                    }
-                except PermissionError:
-                    # Skip inaccessible partitions
+                    total, used, free = partition_usage(mountpoint)
+                except OSError:
+                    # Skip inaccessible, since-unmounted or not-ready partitions
+                    continue
+                if not total:
                     continue
+                resource_stats["disk"][mountpoint] = {
+                    "total_gb": round(total / (1024**3), 2),
+                    "free_gb": round(free / (1024**3), 2),
+                    "used_percent": round((used / total) * 100, 1),
+                    "filesystem": fstype
+                }
                     
         except Exception as e:
             logger.error(f"Error collecting system stats: {e}")
-            stats["system_error"] = str(e)
+            resource_stats["system_error"] = str(e)
     
     # Add process-specific stats
     try:
         current_process = psutil.Process() if PSUTIL_AVAILABLE else None
         if current_process:
+            open_files, sockets = count_process_handles()
             with current_process.oneshot():
-                stats["process"] = {
+                resource_stats["process"] = {
                     "pid": current_process.pid,
                     "memory_mb": round(current_process.memory_info().rss / (1024**2), 2),
                     "cpu_percent": current_process.cpu_percent(),
                     "num_threads": current_process.num_threads(),
-                    "open_files": len(current_process.open_files()),
-                    "connections": len(current_process.connections()),
+                    "open_files": open_files,
+                    "connections": sockets,
                     "create_time": datetime.fromtimestamp(current_process.create_time()).isoformat()
                 }
     except Exception as e:
         logger.error(f"Error collecting process stats: {e}")
-        stats["process_error"] = str(e)
+        resource_stats["process_error"] = str(e)
+    
+    return resource_stats
+
+# Enhanced endpoint for system statistics
+@app.route('/stats', methods=['GET'])
+@enhanced_error_handler
+def get_system_stats():
+    """Enhanced system statistics for monitoring"""
+    stats = {
+        "timestamp": datetime.now().isoformat(),
+        "version": "1.0.0",
+        "system": PLATFORM_INFO,
+        "libraries": LIBRARY_STATUS,
+        "cache": CacheManager.get_cache_stats(),
+        "concurrent_operations": operation_limiter.in_flight,
+        "max_concurrent_operations": MAX_CONCURRENT_OPERATIONS
+    }
+    
+    # psutil sections are shared across probes for STATS_TTL_SECONDS
+    stats.update(collect_resource_stats())
     
     # Add directory stats
     stats["directories"] = {}
     for name, path in [("cache", CACHE_DIR), ("temp", TEMP_DIR), ("uploads", UPLOADS_DIR)]:
         try:
             if path.exists():
-                files = list(path.glob("*"))
-                total_size = sum(f.stat().st_size for f in files if f.is_file())
+                file_count, total_size = summarize_directory(path)
                 stats["directories"][name] = {
                     "path": str(path),
                     "exists": True,
-                    "file_count": len([f for f in files if f.is_file()]),
+                    "file_count": file_count,
                     "total_size_mb": round(total_size / (1024**2), 2),
                     "writable": os.access(path, os.W_OK)
                 }
@@ -1022,7 +1654,7 @@ def get_metrics():
     metrics = {
         "timestamp": datetime.now().isoformat(),
         "system": {
-            "uptime_seconds": time.time() - app.start_time if hasattr(app, 'start_time') else 0,
+            "uptime_seconds": time.monotonic() - APP_START,
             "version": "1.0.0"
         },
         "requests": {
@@ -1036,31 +1668,22 @@ def get_metrics():
             }
         },
         "operations": {
-            "concurrent_operations": MAX_CONCURRENT_OPERATIONS - operation_semaphore._value,
+            "concurrent_operations": operation_limiter.in_flight,
             "max_concurrent_operations": MAX_CONCURRENT_OPERATIONS,
-            "semaphore_available": operation_semaphore._value
+            "semaphore_available": operation_limiter.available
         },
         "cache": CacheManager.get_cache_stats(),
-        "libraries": {
-            "pymupdf": PYMUPDF_AVAILABLE,
-            "pdf2docx": PDF2DOCX_AVAILABLE,
-            "pillow": PIL_AVAILABLE,
-            "psutil": PSUTIL_AVAILABLE,
-            "magic": MAGIC_AVAILABLE
-        }
+        "libraries": LIBRARY_STATUS
     }
     
     # Add error statistics
     if hasattr(g, 'start_time'):
-        recent_errors = defaultdict(int)
-        for error in last_errors[-100:]:  # Last 100 errors
-            recent_errors[error.get('type', 'unknown')] += 1
-        
-        metrics["errors"] = {
-            "recent_count": len(last_errors[-100:]),
-            "by_type": dict(recent_errors),
-            "total_tracked": len(last_errors)
-        }
+        with error_lock:
+            metrics["errors"] = {
+                "recent_count": len(last_errors),  # Last MAX_ERROR_HISTORY errors
+                "by_type": dict(error_type_counts.most_common(20)),
+                "total_tracked": errors_tracked_total
+            }
     
     return jsonify(metrics)
 
@@ -1074,22 +1697,22 @@ def clear_cache():
         
         removed_files = 0
         freed_space = 0
+        directories = []
         
-        if clear_type in ['all', 'cache']:
-            for cache_file in CACHE_DIR.glob('*'):
-                if cache_file.is_file():
-                    freed_space += cache_file.stat().st_size
-                    cache_file.unlink()
-                    removed_files += 1
+        if clear_type in ('all', 'cache'):
+            directories.append(CACHE_DIR)
+            memory_cache.clear()
         
-        if clear_type in ['all', 'temp']:
-            for temp_file in TEMP_DIR.glob('*'):
-                if temp_file.is_file():
-                    freed_space += temp_file.stat().st_size
-                    temp_file.unlink()
-                    removed_files += 1
+        if clear_type in ('all', 'temp'):
+            directories.append(TEMP_DIR)
         
-        logger.info(f"Cache cleared: {removed_files} files, {freed_space / (1024**2):.1f}MB freed")
+        for directory in directories:
+            count, size = summarize_directory(directory)
+            removed_files += count
+            freed_space += size
+        
+        # Unlink off the request thread; the response reports the totals counted above
+        threading.Thread(target=clear_directories, args=(directories,), name="cache-clear", daemon=True).start()
         
         return jsonify({
             "message": f"Cache cleared successfully ({clear_type})",
@@ -1102,96 +1725,308 @@ def clear_cache():
         logger.error(f"Cache clear error: {e}")
         return jsonify({"error": f"Cache clear failed: {str(e)}"}), 500
 
-# Copy all the existing endpoints from app.py with enhanced error handling
-@app.route('/pdf-to-docx', methods=['POST'])
-@rate_limit('pdf_convert')
-@enhanced_error_handler
-def pdf_to_docx():
+# PDF to DOCX conversion modes: fast (PyMuPDF only), accurate (pdf2docx first), auto (heuristic)
+PDF_CONVERSION_MODES = ('fast', 'accurate', 'auto')
+
+def is_text_heavy_pdf(doc, sample_size=5, max_images_per_page=1, max_drawings_per_page=50):
     """
-    Convert PDF to DOCX using pdf2docx or PyMuPDF with advanced text and image extraction
-    Features: File caching, multiple conversion methods, image preservation
+    Sample a few pages to decide whether plain PyMuPDF extraction is good enough.
+    pdf2docx is 10-30x slower because of its layout analysis, so it is only worth
+    running when pages contain images, vector tables or no extractable text.
     """
-    logger.info("PDF to DOCX conversion request received")
-    
-    if not (PDF2DOCX_AVAILABLE or PYMUPDF_AVAILABLE):
-        return jsonify({
-            "error": "PDF to DOCX conversion not available. Install pdf2docx or PyMuPDF"
-        }), 500
-    
-    # Validate file upload
-    try:
-        validate_file_upload(request.files.get('file'), ['.pdf'], max_size_mb=100)
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 400
-    
-    file = request.files['file']
-    force_conversion = request.form.get('force', 'false').lower() == 'true'
-    include_images = request.form.get('images', 'true').lower() == 'true'
-    
+    page_count = len(doc)
+    if page_count == 0:
+        return False
+
+    step = max(1, page_count // sample_size)
+    for page_num in range(0, page_count, step)[:sample_size]:
+        page = doc.load_page(page_num)
+        if len(page.get_images()) > max_images_per_page:
+            return False
+        if len(page.get_drawings()) > max_drawings_per_page:  # Ruled tables, charts
+            return False
+        if not page.get_text("text").strip():  # Scanned page
+            return False
+
+    return True
+
+# CPU-bound PDF work runs in worker processes so request threads don't contend
+# for the GIL. Page extraction wants one Document per process and gains little
+# past 4 workers.
+PROCESS_POOL_WORKERS = os.cpu_count() or 1
+PDF_EXTRACT_WORKERS = min(PROCESS_POOL_WORKERS, 4)
+PARALLEL_EXTRACT_MIN_PAGES = 8
+PARALLEL_EXTRACT_CHUNK_PAGES = 4
+_process_pool = None
+_process_pool_lock = Lock()
+
+def get_process_pool():
+    """Lazily create the shared process pool used for CPU-bound PDF work"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS,
+                                                initializer=init_worker_logging)
+        return _process_pool
+
+def reset_process_pool():
+    """Drop a broken pool (e.g. a worker was OOM-killed) so the next call recreates it"""
+    global _process_pool
+    with _process_pool_lock:
+        _process_pool = None
+
+def run_in_process_pool(func, *args):
+    """Run func(*args) in the shared process pool and wait for the result"""
     try:
-        # Read file content and generate hash
-        file_content = file.read()
-        file_hash = CacheManager.get_file_hash(file_content)
+        return get_process_pool().submit(func, *args).result()
+    except BrokenProcessPool:
+        reset_process_pool()
+        raise
+
+def extract_page_blocks(page, include_images):
+    """
+    Extract ('text', str) and ('image', xref) blocks from a page in reading order.
+    Images are referenced by xref so each one is decoded once per document,
+    not once per placement; inline images (xref 0) are skipped.
+    """
+    images = []
+    # get_images() only reads the resource dict; get_image_info() re-interprets the whole
+    # page content stream, costing as much as text extraction, so skip it on image-less pages
+    if include_images and page.get_images():
+        images = sorted(
+            (info["bbox"][1], info["xref"])
+            for info in page.get_image_info(xrefs=True) if info["xref"]
+        )
+    
+    blocks = []
+    text_flags = fitz.TEXTFLAGS_BLOCKS & ~fitz.TEXT_PRESERVE_IMAGES
+    # MuPDF groups spans and lines into paragraph blocks in C
+    for x0, y0, x1, y1, block_text, block_no, block_type in page.get_text("blocks", flags=text_flags):
+        if block_type != 0:
+            continue
+        
+        # Place images that sit above this text block
+        while images and images[0][0] <= y0:
+            blocks.append(('image', images.pop(0)[1]))
         
+        block_text = block_text.strip()
+        if block_text:
+            blocks.append(('text', block_text))
+    
+    blocks.extend(('image', xref) for _, xref in images)
+    return blocks
+
+def extract_images(doc, page_blocks):
+    """Extract every referenced image once, keyed by xref"""
+    images = {}
+    for blocks in page_blocks:
+        for block_type, xref in blocks:
+            if block_type == 'image' and xref not in images:
+                try:
+                    images[xref] = doc.extract_image(xref)["image"]
+                except Exception as e:
+                    logger.warning(f"Failed to extract image xref {xref}: {e}")
+                    images[xref] = None
+    return images
+
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+def add_plain_paragraph(sect_pr, text):
+    """
+    Insert a plain-text w:p before the body's sectPr using raw lxml calls.
+    Produces the same XML as Document.add_paragraph(text) (line breaks and tabs included)
+    without building python-docx proxy objects for every block.
+    """
+    paragraph = OxmlElement('w:p')
+    run = etree.SubElement(paragraph, qn('w:r'))
+    for line_num, line in enumerate(text.split('\n')):
+        if line_num:
+            etree.SubElement(run, qn('w:br'))
+        for tab_num, segment in enumerate(line.split('\t')):
+            if tab_num:
+                etree.SubElement(run, qn('w:tab'))
+            if segment:
+                text_element = etree.SubElement(run, qn('w:t'))
+                text_element.text = segment
+                if segment != segment.strip():
+                    text_element.set(XML_SPACE, 'preserve')
+    sect_pr.addprevious(paragraph)
+
+def _extract_page_range(pdf_path, start, end, include_images):
+    """Process pool worker: extract blocks and images for pages [start, end) of a PDF"""
+    doc = fitz.open(pdf_path)
+    try:
+        page_blocks = [extract_page_blocks(doc.load_page(page_num), include_images)
+                       for page_num in range(start, end)]
+        return page_blocks, extract_images(doc, page_blocks)
+    finally:
+        doc.close()
+
+def iter_pdf_blocks(doc, pdf_path, include_images):
+    """
+    Yield (page_blocks, images) for consecutive page ranges, in page order.
+    Long PDFs are extracted by worker processes in small ranges, so the caller can
+    build the DOCX from the first ranges while later ones are still being extracted.
+    """
+    page_count = len(doc)
+    next_page = 0
+    
+    if page_count >= PARALLEL_EXTRACT_MIN_PAGES and PDF_EXTRACT_WORKERS > 1:
+        futures = deque()
+        try:
+            # Small ranges let results be consumed in order while later ones extract; at most
+            # PDF_EXTRACT_WORKERS are in flight, so one long PDF cannot occupy the whole shared pool
+            chunk_size = max(PARALLEL_EXTRACT_CHUNK_PAGES, -(-page_count // (PDF_EXTRACT_WORKERS * 4)))
+            pool = get_process_pool()
+            starts = iter(range(0, page_count, chunk_size))
+            
+            def submit_next():
+                start = next(starts, None)
+                if start is not None:
+                    futures.append((start, pool.submit(_extract_page_range, pdf_path, start,
+                                                       min(start + chunk_size, page_count), include_images)))
+            
+            for _ in range(PDF_EXTRACT_WORKERS):
+                submit_next()
+            while futures:
+                start, future = futures[0]
+                range_blocks, range_images = future.result()
+                futures.popleft()
+                submit_next()
+                yield range_blocks, range_images
+                next_page = start + len(range_blocks)
+            return
+        except BrokenProcessPool as e:
+            reset_process_pool()
+            logger.warning(f"Process pool broke during page extraction, finishing serially: {e}")
+        except Exception as e:
+            logger.warning(f"Parallel page extraction failed, finishing serially: {e}")
+        finally:
+            for _, future in futures:
+                future.cancel()
+    
+    page_blocks = [extract_page_blocks(doc.load_page(page_num), include_images)
+                   for page_num in range(next_page, page_count)]
+    yield page_blocks, extract_images(doc, page_blocks)
+
+def _convert_with_pdf2docx(pdf_path, docx_path):
+    """
+    Process pool worker: run pdf2docx layout conversion, writing the DOCX to docx_path.
+    Returns the page count from the converter's own document, so callers need not reopen the PDF.
+    """
+    from pdf2docx import Converter  # Deferred to the worker; see PDF2DOCX_AVAILABLE
+    
+    converter = Converter(pdf_path)
+    try:
+        converter.convert(
+            docx_path,
+            start=0,
+            end=None,
+            pages=None,
+            multi_processing=False,  # Parallelism comes from the shared pool
+            cpu_count=1
+        )
+        return converter.fitz_doc.page_count
+    finally:
+        converter.close()
+
+# Copy all the existing endpoints from app.py with enhanced error handling
+@app.route('/pdf-to-docx', methods=['POST'])
+@rate_limit('pdf_convert')
+@enhanced_error_handler
+def pdf_to_docx():
+    """
+    Convert PDF to DOCX using pdf2docx or PyMuPDF with advanced text and image extraction
+    Features: File caching, multiple conversion methods, image preservation
+    Modes: fast (PyMuPDF only), accurate (pdf2docx first), auto (PyMuPDF for text-heavy PDFs)
+    """
+    logger.info("PDF to DOCX conversion request received")
+    
+    if not (PDF2DOCX_AVAILABLE or PYMUPDF_AVAILABLE):
+        return jsonify({
+            "error": "PDF to DOCX conversion not available. Install pdf2docx or PyMuPDF"
+        }), 500
+    
+    # Validate file upload
+    try:
+        validate_file_upload(request.files.get('file'), PDF_EXTENSIONS, max_size_mb=100)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    file = request.files['file']
+    force_conversion = request.form.get('force', 'false').lower() == 'true'
+    include_images = request.form.get('images', 'true').lower() == 'true'
+    mode = request.form.get('mode', request.args.get('mode', 'auto')).lower()
+    if mode not in PDF_CONVERSION_MODES:
+        mode = 'auto'
+    
+    # Spool the upload to disk in chunks and hash it on the way, never holding it all in memory
+    try:
+        temp_pdf, file_hash, file_size = spool_upload_to_disk(file, '.pdf', max_size_mb=100, signature=b'%PDF-')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    pdf_path = str(temp_pdf)
+    docx_path = None
+    
+    try:
         # Generate filenames
         original_name = secure_filename(file.filename)
         base_name = Path(original_name).stem
         output_filename = f"{base_name}.docx"
         
-        # Check cache
-        cache_key = f"{file_hash}_{include_images}_{output_filename}"
+        # Check cache; keyed on content only so re-uploads under another name still hit
+        cache_key = f"{file_hash}_{include_images}_{mode}.docx"
         cached_file = CACHE_DIR / cache_key
         
         if cached_file.exists() and not force_conversion:
             logger.info(f"Returning cached DOCX: {output_filename}")
-            return send_file(
-                cached_file,
-                as_attachment=True,
-                download_name=output_filename,
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            )
-        
-        # Create temporary files
-        temp_pdf = TEMP_DIR / f"{file_hash}_input.pdf"
-        temp_docx = TEMP_DIR / f"{file_hash}_output.docx"
+            return send_cached_file(cached_file, output_filename, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
         
-        # Write PDF file
-        with open(temp_pdf, 'wb') as f:
-            f.write(file_content)
+        # Both converters read the spooled upload by path and write the DOCX straight to disk
+        docx_path = CacheManager.staging_path(cached_file)
         
         conversion_success = False
         conversion_method = ""
         conversion_stats = {"pages": 0, "images": 0, "text_chars": 0}
         
+        # Open the PDF once; the PyMuPDF branch reuses this document
+        pdf_doc = None
+        if PYMUPDF_AVAILABLE:
+            try:
+                pdf_doc = fitz.open(pdf_path)
+            except Exception as e:
+                logger.warning(f"PyMuPDF could not open PDF: {e}")
+        
+        # Skip pdf2docx when the fast PyMuPDF path would produce the same result
+        pymupdf_ready = pdf_doc is not None and PYTHON_DOCX_AVAILABLE
+        if mode == 'accurate' or not pymupdf_ready:
+            use_pdf2docx = True
+        elif mode == 'fast':
+            use_pdf2docx = False
+        else:
+            try:
+                use_pdf2docx = not is_text_heavy_pdf(pdf_doc)
+            except Exception as e:
+                logger.warning(f"PDF content check failed, using pdf2docx: {e}")
+                use_pdf2docx = True
+        
+        if pymupdf_ready and not use_pdf2docx:
+            logger.info(f"Using PyMuPDF fast path (mode: {mode})")
+        
         # Method 1: Try pdf2docx (most accurate with layout preservation)
-        if PDF2DOCX_AVAILABLE and not conversion_success:
+        if PDF2DOCX_AVAILABLE and use_pdf2docx:
             try:
                 logger.info("Attempting conversion with pdf2docx")
                 
-                # Configure pdf2docx for better conversion
-                converter = Converter(str(temp_pdf))
-                
-                # Convert with advanced options
-                converter.convert(
-                    str(temp_docx),
-                    start=0,
-                    end=None,
-                    pages=None,
-                    multi_processing=False,  # Disable for stability
-                    cpu_count=1
-                )
-                converter.close()
+                # Layout analysis is pure Python; run it off the request thread's GIL
+                page_count = run_in_process_pool(_convert_with_pdf2docx, pdf_path, str(docx_path))
                 
                 # Check if conversion was successful
-                if temp_docx.exists() and temp_docx.stat().st_size > 0:
+                if output_size(docx_path) > 0:
                     conversion_success = True
                     conversion_method = "pdf2docx"
-                    
-                    # Get conversion stats
-                    if PYMUPDF_AVAILABLE:
-                        doc = fitz.open(str(temp_pdf))
-                        conversion_stats["pages"] = len(doc)
-                        doc.close()
+                    conversion_stats["pages"] = page_count
                     
                     logger.info("Conversion successful with pdf2docx (with layout preservation)")
                 else:
@@ -1199,68 +2034,50 @@ def pdf_to_docx():
                     
             except Exception as e:
                 logger.warning(f"pdf2docx conversion failed: {e}")
-                if temp_docx.exists():
-                    temp_docx.unlink()
         
         # Method 2: Try enhanced PyMuPDF with proper DOCX generation
-        if PYMUPDF_AVAILABLE and PYTHON_DOCX_AVAILABLE and not conversion_success:
+        if pymupdf_ready and not conversion_success:
             try:
                 logger.info("Attempting conversion with enhanced PyMuPDF")
                 
-                import io
-                from docx.shared import Inches
-                
-                doc = fitz.open(str(temp_pdf))
+                doc = pdf_doc
                 word_doc = Document()
                 
-                # Add document metadata
+                # Add document metadata; the DOCX is cached by content alone and served to
+                # whoever uploads the same PDF, so nothing per-upload (name, time) goes in here
                 core_props = word_doc.core_properties
-                core_props.title = f"Converted from {original_name}"
                 core_props.author = "ImagePDF Toolkit"
-                core_props.comments = f"Converted using PyMuPDF on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                core_props.comments = "Converted using PyMuPDF"
                 
                 total_text_chars = 0
                 total_images = 0
+                sect_pr = word_doc.element.body.sectPr
                 
-                for page_num in range(len(doc)):
-                    page = doc.load_page(page_num)
-                    
-                    # Add page header
+                # Extract text and images (in parallel for long documents); pages are
+                # appended as each range arrives instead of after the whole PDF is extracted
+                pages = ((blocks, images)
+                         for page_blocks, images in iter_pdf_blocks(doc, pdf_path, include_images)
+                         for blocks in page_blocks)
+                
+                for page_num, (blocks, images) in enumerate(pages):
+                    # Keep PDF page boundaries
                     if page_num > 0:
                         word_doc.add_page_break()
                     
-                    # Extract text with better formatting
-                    text_dict = page.get_text("dict")
-                    
-                    # Process text blocks
-                    for block in text_dict.get("blocks", []):
-                        if "lines" in block:  # Text block
-                            block_text = ""
-                            for line in block["lines"]:
-                                line_text = ""
-                                for span in line.get("spans", []):
-                                    line_text += span.get("text", "")
-                                block_text += line_text + "\n"
-                            
-                            if block_text.strip():
-                                paragraph = word_doc.add_paragraph(block_text.strip())
-                                total_text_chars += len(block_text)
+                    for block_type, block_content in blocks:
+                        if block_type == 'text':
+                            add_plain_paragraph(sect_pr, block_content)
+                            total_text_chars += len(block_content)
                         
-                        elif include_images and "image" in block:  # Image block
+                        else:  # Image block
                             try:
-                                # Extract image
-                                image_index = block["image"]
-                                base_image = doc.extract_image(image_index)
-                                image_bytes = base_image["image"]
-                                
-                                # Add image to document
-                                image_stream = io.BytesIO(image_bytes)
-                                paragraph = word_doc.add_paragraph()
-                                run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
+                                image_bytes = images.get(block_content)
+                                if image_bytes is None:
+                                    raise ValueError(f"image xref {block_content} could not be extracted")
                                 
-                                # Calculate image size (max width 6 inches)
-                                max_width = Inches(6)
-                                run.add_picture(image_stream, width=max_width)
+                                # Add image to document (max width 6 inches)
+                                run = word_doc.add_paragraph().add_run()
+                                run.add_picture(io.BytesIO(image_bytes), width=Inches(6))
                                 
                                 total_images += 1
                                 logger.info(f"Added image {total_images} from page {page_num + 1}")
@@ -1270,15 +2087,17 @@ def pdf_to_docx():
                                 # Add placeholder text for failed image
                                 word_doc.add_paragraph(f"[Image {total_images + 1} - extraction failed]")
                 
+                # Capture the page count before closing; reading it after close() raises "document closed"
+                page_count = doc.page_count
                 doc.close()
                 
                 # Save the document
-                word_doc.save(str(temp_docx))
+                word_doc.save(str(docx_path))
                 
                 conversion_success = True
                 conversion_method = "pymupdf_enhanced"
                 conversion_stats = {
-                    "pages": len(doc),
+                    "pages": page_count,
                     "images": total_images,
                     "text_chars": total_text_chars
                 }
@@ -1288,6 +2107,9 @@ def pdf_to_docx():
             except Exception as e:
                 logger.warning(f"Enhanced PyMuPDF conversion failed: {e}")
         
+        if pdf_doc is not None and not pdf_doc.is_closed:
+            pdf_doc.close()
+        
         if not conversion_success:
             return jsonify({
                 "error": "All conversion methods failed",
@@ -1299,40 +2121,25 @@ def pdf_to_docx():
                 ]
             }), 500
         
-        # Verify output file
-        if not temp_docx.exists() or temp_docx.stat().st_size == 0:
+        # Verify output
+        if output_size(docx_path) == 0:
             return jsonify({
                 "error": "Conversion produced empty file",
                 "details": "The PDF might not contain extractable content"
             }), 500
         
-        # Copy to cache
-        shutil.copy2(temp_docx, cached_file)
+        # Publish to cache atomically
+        os.replace(docx_path, cached_file)
         
         # Log successful conversion
         logger.info(f"Successfully converted {original_name} to DOCX using {conversion_method}")
         logger.info(f"Conversion stats: {conversion_stats}")
         
-        @after_this_request
-        def cleanup(response):
-            try:
-                if temp_pdf.exists():
-                    temp_pdf.unlink()
-                if temp_docx.exists():
-                    temp_docx.unlink()
-            except Exception as e:
-                logger.warning(f"Cleanup error: {e}")
-            return response
-        
         # Return file with conversion stats in headers
-        response = send_file(
-            cached_file,
-            as_attachment=True,
-            download_name=output_filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
+        response = send_cached_file(cached_file, output_filename, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
         
         response.headers['X-Conversion-Method'] = conversion_method
+        response.headers['X-Conversion-Mode'] = mode
         response.headers['X-Pages-Processed'] = str(conversion_stats['pages'])
         response.headers['X-Images-Extracted'] = str(conversion_stats['images'])
         response.headers['X-Text-Characters'] = str(conversion_stats['text_chars'])
@@ -1346,6 +2153,77 @@ def pdf_to_docx():
             "error": f"Conversion failed: {str(e)}",
             "code": "CONVERSION_ERROR"
         }), 500
+    finally:
+        temp_pdf.unlink(missing_ok=True)
+        if docx_path is not None:
+            docx_path.unlink(missing_ok=True)
+
+def _compress_pdf_with_pymupdf(input_path, output_path):
+    """Process pool worker: lossless PyMuPDF re-save of a PDF with object GC and stream deflation"""
+    # Advanced compression options
+    save_options = {
+        "garbage": 4,  # Remove unused objects
+        "deflate": True,  # Enable deflate compression
+        "deflate_images": True,  # Compress images
+        "deflate_fonts": True,  # Compress fonts
+        "linear": True,  # Optimize for web viewing
+        "clean": True,  # Clean up document structure
+        "pretty": False,  # Don't pretty-print (saves space)
+        "ascii": False,  # Use binary encoding
+        "expand": 0  # Don't expand content streams
+    }
+    
+    doc = fitz.open(input_path)
+    try:
+        doc.save(output_path, **save_options)
+    finally:
+        doc.close()
+
+# Ghostscript quality presets, from smallest output to highest fidelity
+GS_PDF_SETTINGS = {
+    'low': '/screen',
+    'medium': '/ebook',
+    'high': '/printer',
+    'max': '/prepress'
+}
+
+# Enhanced Ghostscript options with better compression, shared by every request
+GS_BASE_ARGS = (
+    '-sDEVICE=pdfwrite',
+    '-dCompatibilityLevel=1.4',
+    '-dNOPAUSE',
+    '-dQUIET',
+    '-dBATCH',
+    '-dSAFER',
+    '-dColorImageDownsampleType=/Bicubic',
+    '-dGrayImageDownsampleType=/Bicubic',
+    '-dMonoImageDownsampleType=/Bicubic',
+    '-dOptimize=true',
+    '-dEmbedAllFonts=true',
+    '-dSubsetFonts=true',
+    '-dCompressFonts=true',
+    '-dDetectDuplicateImages=true',
+)
+
+GS_QUALITY_ARGS = {
+    'low': (
+        '-dColorImageResolution=72',
+        '-dGrayImageResolution=72',
+        '-dMonoImageResolution=300',
+        '-dDownsampleColorImages=true',
+        '-dDownsampleGrayImages=true'
+    ),
+    'medium': (
+        '-dColorImageResolution=150',
+        '-dGrayImageResolution=150',
+        '-dMonoImageResolution=600'
+    ),
+    'high': (
+        '-dColorImageResolution=300',
+        '-dGrayImageResolution=300',
+        '-dMonoImageResolution=1200'
+    ),
+}
 
 @app.route('/compress-pdf', methods=['POST'])
 @rate_limit('compress')
@@ -1362,31 +2240,20 @@ def compress_pdf():
             "error": "PDF compression not available. Install Ghostscript or PyMuPDF"
         }), 500
     
-    # Validate file upload
+    # Validate file upload; the same pass yields the size and cache hash, so the body is never read into memory
     try:
-        validate_file_upload(request.files.get('file'), ['.pdf'], max_size_mb=100)
+        _, original_size, _, file_hash = validate_file_upload(
+            request.files.get('file'), PDF_EXTENSIONS, max_size_mb=100, hasher=CacheManager.new_file_hasher())
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     
     file = request.files['file']
     force_compression = request.form.get('force', 'false').lower() == 'true'
     
-    # Quality settings for Ghostscript
-    quality_map = {
-        'low': '/screen',      # Lowest quality, smallest size
-        'medium': '/ebook',    # Medium quality
-        'high': '/printer',    # High quality
-        'max': '/prepress'     # Maximum quality
-    }
     quality = request.form.get('quality', 'medium').lower()
-    gs_quality = quality_map.get(quality, '/ebook')
+    gs_quality = GS_PDF_SETTINGS.get(quality, '/ebook')
     
     try:
-        # Read file content and generate hash
-        file_content = file.read()
-        file_hash = CacheManager.get_file_hash(file_content)
-        original_size = len(file_content)
-        
         # Generate filenames
         original_name = secure_filename(file.filename)
         base_name = Path(original_name).stem
@@ -1396,18 +2263,13 @@ def compress_pdf():
         cache_key = f"{file_hash}_{quality}_{output_filename}"
         cached_file = CACHE_DIR / cache_key
         
-        if cached_file.exists() and not force_compression:
-            compressed_size = cached_file.stat().st_size
+        response = None if force_compression else send_cache_hit(cached_file, output_filename, 'application/pdf')
+        if response is not None:
+            compressed_size = response.content_length
             compression_ratio = (1 - compressed_size / original_size) * 100
             
             logger.info(f"Returning cached compressed PDF: {output_filename} ({compression_ratio:.1f}% reduction)")
             
-            response = send_file(
-                cached_file,
-                as_attachment=True,
-                download_name=output_filename,
-                mimetype='application/pdf'
-            )
             response.headers['X-Compression-Ratio'] = f"{compression_ratio:.1f}%"
             response.headers['X-Original-Size'] = str(original_size)
             response.headers['X-Compressed-Size'] = str(compressed_size)
@@ -1417,13 +2279,7 @@ def compress_pdf():
         # Check if file is already small enough
         if original_size < 1024 * 1024 and not force_compression:  # < 1MB
             logger.info("File already small, skipping compression")
-            import io
-            response = send_file(
-                io.BytesIO(file_content),
-                as_attachment=True,
-                download_name=original_name,
-                mimetype='application/pdf'
-            )
+            response = send_bytes(file.read(), original_name, 'application/pdf')
             response.headers['X-Compression-Ratio'] = "0%"
             response.headers['X-Message'] = "File already optimized"
             return response
@@ -1432,9 +2288,8 @@ def compress_pdf():
         temp_input = TEMP_DIR / f"{file_hash}_input.pdf"
         temp_output = TEMP_DIR / f"{file_hash}_compressed.pdf"
         
-        # Write input file
-        with open(temp_input, 'wb') as f:
-            f.write(file_content)
+        # Stream the upload to disk in chunks; only now is a local copy actually needed
+        file.save(str(temp_input))
         
         compression_success = False
         compression_method = ""
@@ -1447,60 +2302,27 @@ def compress_pdf():
                 
                 gs_cmd = SYSTEM_TOOLS['ghostscript']['path']
                 
-                # Enhanced Ghostscript command with better compression
                 cmd = [
                     gs_cmd,
-                    '-sDEVICE=pdfwrite',
-                    '-dCompatibilityLevel=1.4',
+                    *GS_BASE_ARGS,
                     f'-dPDFSETTINGS={gs_quality}',
-                    '-dNOPAUSE',
-                    '-dQUIET',
-                    '-dBATCH',
-                    '-dSAFER',
-                    '-dColorImageDownsampleType=/Bicubic',
-                    '-dGrayImageDownsampleType=/Bicubic',
-                    '-dMonoImageDownsampleType=/Bicubic',
-                    '-dOptimize=true',
-                    '-dEmbedAllFonts=true',
-                    '-dSubsetFonts=true',
-                    '-dCompressFonts=true',
-                    '-dDetectDuplicateImages=true',
+                    *GS_QUALITY_ARGS.get(quality, ()),
                     f'-sOutputFile={temp_output}',
                     str(temp_input)
                 ]
                 
-                # Add quality-specific settings
-                if quality == 'low':
-                    cmd.extend([
-                        '-dColorImageResolution=72',
-                        '-dGrayImageResolution=72',
-                        '-dMonoImageResolution=300',
-                        '-dDownsampleColorImages=true',
-                        '-dDownsampleGrayImages=true'
-                    ])
-                elif quality == 'medium':
-                    cmd.extend([
-                        '-dColorImageResolution=150',
-                        '-dGrayImageResolution=150',
-                        '-dMonoImageResolution=600'
-                    ])
-                elif quality == 'high':
-                    cmd.extend([
-                        '-dColorImageResolution=300',
-                        '-dGrayImageResolution=300',
-                        '-dMonoImageResolution=1200'
-                    ])
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                # close_fds (the default) lets CPython use close_range(2) in the child
+                result = subprocess.run(cmd, capture_output=True, timeout=300)
                 
-                if result.returncode == 0 and temp_output.exists() and temp_output.stat().st_size > 0:
+                compressed_size = output_size(temp_output) if result.returncode == 0 else 0
+                if compressed_size > 0:
                     compression_success = True
                     compression_method = "ghostscript"
-                    compression_stats["compressed_size"] = temp_output.stat().st_size
+                    compression_stats["compressed_size"] = compressed_size
                     compression_stats["method"] = f"Ghostscript ({quality})"
                     logger.info("Compression successful with Ghostscript")
                 else:
-                    logger.warning(f"Ghostscript compression failed: {result.stderr}")
+                    logger.warning(f"Ghostscript compression failed: {result.stderr.decode(errors='replace')}")
                     
             except subprocess.TimeoutExpired:
                 logger.warning("Ghostscript compression timeout")
@@ -1514,40 +2336,14 @@ def compress_pdf():
             try:
                 logger.info("Attempting compression with enhanced PyMuPDF")
                 
-                doc = fitz.open(str(temp_input))
-                
-                # Quality-based compression parameters
-                if quality == 'low':
-                    deflate_level = 9
-                elif quality == 'medium':
-                    deflate_level = 6
-                elif quality == 'high':
-                    deflate_level = 3
-                else:  # max
-                    deflate_level = 1
-                
-                # Advanced compression options
-                save_options = {
-                    "garbage": 4,  # Remove unused objects
-                    "deflate": True,  # Enable deflate compression
-                    "deflate_images": True,  # Compress images
-                    "deflate_fonts": True,  # Compress fonts
-                    "linear": True,  # Optimize for web viewing
-                    "clean": True,  # Clean up document structure
-                    "pretty": False,  # Don't pretty-print (saves space)
-                    "ascii": False,  # Use binary encoding
-                    "expand": 0,  # Don't expand content streams
-                    "compression": deflate_level
-                }
+                # MuPDF holds the GIL for the whole garbage-collect/deflate pass; run it in the pool
+                run_in_process_pool(_compress_pdf_with_pymupdf, str(temp_input), str(temp_output))
                 
-                # Save with optimizations
-                doc.save(str(temp_output), **save_options)
-                doc.close()
-                
-                if temp_output.exists() and temp_output.stat().st_size > 0:
+                compressed_size = output_size(temp_output)
+                if compressed_size > 0:
                     compression_success = True
                     compression_method = "pymupdf_enhanced"
-                    compression_stats["compressed_size"] = temp_output.stat().st_size
+                    compression_stats["compressed_size"] = compressed_size
                     compression_stats["method"] = f"PyMuPDF Enhanced ({quality})"
                     logger.info("Compression successful with enhanced PyMuPDF")
                 else:
@@ -1569,7 +2365,7 @@ def compress_pdf():
             }), 500
         
         # Calculate compression ratio
-        compressed_size = temp_output.stat().st_size
+        compressed_size = compression_stats["compressed_size"]
         compression_ratio = (1 - compressed_size / original_size) * 100
         
         # Only keep compressed version if it's actually smaller
@@ -1585,8 +2381,7 @@ def compress_pdf():
             response.headers['X-Message'] = "Original file already optimized"
             return response
         
-        # Copy to cache
-        shutil.copy2(temp_output, cached_file)
+        CacheManager.adopt(temp_output, cached_file)
         
         # Update compression stats
         compression_stats["compression_ratio"] = compression_ratio
@@ -1600,18 +2395,11 @@ def compress_pdf():
             try:
                 if temp_input.exists():
                     temp_input.unlink()
-                if temp_output.exists():
-                    temp_output.unlink()
             except Exception as e:
                 logger.warning(f"Cleanup error: {e}")
             return response
         
-        response = send_file(
-            cached_file,
-            as_attachment=True,
-            download_name=output_filename,
-            mimetype='application/pdf'
-        )
+        response = send_cached_file(cached_file, output_filename, 'application/pdf')
         response.headers['X-Compression-Ratio'] = f"{compression_ratio:.1f}%"
         response.headers['X-Original-Size'] = str(original_size)
         response.headers['X-Compressed-Size'] = str(compressed_size)
@@ -1628,13 +2416,121 @@ def compress_pdf():
             "code": "COMPRESSION_ERROR"
         }), 500
 
+# IJG base luminance table; scaled copies of it are what libjpeg writes for quality 1-100
+JPEG_BASE_LUMA_TABLE_SUM = sum((
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+))
+# Skip re-encoding JPEGs already at or below the requested quality (plus this margin)
+JPEG_QUALITY_SKIP_MARGIN = 5
+# PNGs under this many bytes per pixel are already tightly packed
+PNG_DENSE_BYTES_PER_PIXEL = 1.0
+# zlib level 6 is several times faster than 9 for a few percent larger PNGs
+PNG_COMPRESS_LEVEL = 6
+# Huffman optimization costs an extra pass; only pay it when the caller asks for high quality
+JPEG_OPTIMIZE_MIN_QUALITY = 90
+
+def estimate_jpeg_quality(img):
+    """Estimate the libjpeg quality an opened JPEG was saved at, or None if unknown"""
+    tables = getattr(img, 'quantization', None)
+    if not tables or 0 not in tables:
+        return None
+    # Table sums are order-independent, so zigzag vs natural order doesn't matter
+    scale = sum(tables[0]) * 100 / JPEG_BASE_LUMA_TABLE_SUM
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return max(1, min(100, round(quality)))
+
+def flatten_to_rgb(img):
+    """
+    Matte a transparent image onto white for JPEG output. An RGBA image passed as its
+    own paste() mask composites on its alpha band directly, without split() copying every band.
+    """
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    background = Image.new('RGB', img.size, (255, 255, 255))
+    background.paste(img, mask=img)
+    return background
+
+# Per-format encoders, picked once per extension instead of rebuilding save kwargs per request
+def _save_jpeg(img, out, quality, png_level=PNG_COMPRESS_LEVEL):
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = flatten_to_rgb(img)
+    img.save(out, 'JPEG', quality=quality, optimize=quality >= JPEG_OPTIMIZE_MIN_QUALITY, progressive=True)
+
+def _save_png(img, out, quality, png_level=PNG_COMPRESS_LEVEL):
+    # PNG doesn't use quality, and optimize=True would force zlib level 9 in Pillow's PNG encoder
+    img.save(out, 'PNG', compress_level=png_level)
+
+def _save_webp(img, out, quality, png_level=PNG_COMPRESS_LEVEL):
+    img.save(out, 'WEBP', quality=quality, method=6, lossless=False, alpha_quality=quality)
+
+def _save_native(img, out, quality, png_level=PNG_COMPRESS_LEVEL):
+    # BMP/TIFF: re-save in the source format
+    img.save(out, img.format or 'JPEG', quality=quality, optimize=quality >= JPEG_OPTIMIZE_MIN_QUALITY)
+
+IMAGE_ENCODERS = {
+    '.jpg': _save_jpeg,
+    '.jpeg': _save_jpeg,
+    '.png': _save_png,
+    '.webp': _save_webp
+}
+
+VIPS_ENCODE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.webp'})
+
+def encode_with_vips(data, file_ext, quality, bounds=None):
+    """
+    Decode, optionally downscale to fit bounds, and re-encode a JPEG/WebP with libvips.
+    Tiles stream through the pipeline, so no full-resolution pixel buffer is held.
+    Returns (encoded_bytes, (width, height)).
+    """
+    if bounds:
+        # Shrink-on-load: libjpeg/libwebp decode straight to roughly the target size
+        image = pyvips.Image.thumbnail_buffer(data, bounds[0], height=bounds[1], size='down')
+    else:
+        image = pyvips.Image.new_from_buffer(data, '', access='sequential')
+    
+    if file_ext in JPEG_EXTENSIONS:
+        if image.hasalpha():
+            image = image.flatten(background=255)
+        encoded = image.write_to_buffer('.jpg', Q=quality, strip=True, interlace=True,
+                                        optimize_coding=quality >= JPEG_OPTIMIZE_MIN_QUALITY)
+    else:
+        encoded = image.write_to_buffer('.webp', Q=quality, effort=6, alpha_q=quality, strip=True)
+    return encoded, (image.width, image.height)
+
+def optimize_losslessly(data, file_ext):
+    """
+    Re-optimize an encoded JPEG (mozjpeg) or PNG (oxipng) without decoding pixels.
+    Returns None when no optimizer applies or it fails, so callers fall back to Pillow.
+    """
+    try:
+        if file_ext in JPEG_EXTENSIONS and MOZJPEG_AVAILABLE:
+            return mozjpeg_lossless_optimization.optimize(data)
+        if file_ext == '.png' and OXIPNG_AVAILABLE:
+            return oxipng.optimize_from_memory(data, level=2, strip=oxipng.StripChunks.safe())
+    except Exception as e:
+        logger.warning(f"Lossless optimization failed, falling back to Pillow: {e}")
+    return None
+
+def positive_int_field(name, default=None):
+    """Optional integer form field; raises ValueError when it is present but not > 0"""
+    value = request.form.get(name, type=int)
+    if value is None:
+        return default
+    if value <= 0:
+        raise ValueError(f"{name} must be a positive integer")
+    return value
+
 @app.route('/compress-image', methods=['POST'])
 @rate_limit('compress')
 @enhanced_error_handler
 def compress_image():
     """
     Compress image files using Pillow
-    Features: Quality control, format optimization, smart caching
+    Features: Quality control, format optimization, smart caching,
+    optional downscaling via max_width / max_height (positive integers)
     """
     logger.info("Image compression request received")
     
@@ -1643,117 +2539,148 @@ def compress_image():
             "error": "Image compression not available. Install Pillow"
         }), 500
     
-    # Validate file upload
+    # Validate file upload; the same pass yields the size and cache hash
     try:
-        validate_file_upload(request.files.get('file'), ['.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff'], max_size_mb=50)
+        _, original_size, _, file_hash = validate_file_upload(
+            request.files.get('file'), IMAGE_EXTENSIONS, max_size_mb=50, hasher=CacheManager.new_file_hasher())
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     
     file = request.files['file']
     quality = int(request.form.get('quality', 85))  # Default quality 85%
     force_compression = request.form.get('force', 'false').lower() == 'true'
+    try:
+        max_width = positive_int_field('max_width')
+        max_height = positive_int_field('max_height')
+        # max_dimension bounds the longer side; it tightens max_width/max_height rather than replacing them
+        max_dimension = positive_int_field('max_dimension', config.IMAGE_MAX_DIMENSION)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if max_dimension > 0:
+        max_width = min(max_width or max_dimension, max_dimension)
+        max_height = min(max_height or max_dimension, max_dimension)
+    resize_requested = bool(max_width or max_height)
+    png_level = min(max(request.form.get('png_level', PNG_COMPRESS_LEVEL, type=int), 0), 9)
     
     try:
-        import io
-        
-        # Read file content and generate hash
-        file_content = file.read()
-        file_hash = CacheManager.get_file_hash(file_content)
-        original_size = len(file_content)
-        
         # Generate filenames
         original_name = secure_filename(file.filename)
-        base_name = Path(original_name).stem
-        file_ext = Path(original_name).suffix.lower()
+        name_path = Path(original_name)
+        base_name, file_ext = name_path.stem, name_path.suffix.lower()
         output_filename = f"{base_name}_compressed{file_ext}"
         
-        # Check cache with quality suffix
-        cached_file = CACHE_DIR / f"{file_hash}_q{quality}_{output_filename}"
-        
-        if cached_file.exists() and not force_compression:
-            compressed_size = cached_file.stat().st_size
+        # Check cache with quality (and target size) suffix
+        size_suffix = f"_{max_width or 0}x{max_height or 0}" if resize_requested else ""
+        # Unresized PNGs go through oxipng, which ignores png_level, so only Pillow output is keyed on it
+        pillow_png = file_ext == '.png' and (resize_requested or not OXIPNG_AVAILABLE)
+        level_suffix = f"_z{png_level}" if pillow_png else ""
+        # Without an explicit quality, JPEGs are only re-optimized losslessly
+        lossless_requested = MOZJPEG_AVAILABLE and file_ext in JPEG_EXTENSIONS and 'quality' not in request.form
+        quality_tag = "lossless" if lossless_requested else f"q{quality}"
+        cached_file = CACHE_DIR / f"{file_hash}_{quality_tag}{level_suffix}{size_suffix}_{output_filename}"
+        
+        response = None if force_compression else send_cache_hit(cached_file, output_filename, f'image/{file_ext[1:]}')
+        if response is not None:
+            compressed_size = response.content_length
             compression_ratio = (1 - compressed_size / original_size) * 100
             
             logger.info(f"Returning cached compressed image: {output_filename} ({compression_ratio:.1f}% reduction)")
             
-            response = send_file(
-                cached_file,
-                as_attachment=True,
-                download_name=output_filename,
-                mimetype=f'image/{file_ext[1:]}'
-            )
             response.headers['X-Compression-Ratio'] = f"{compression_ratio:.1f}%"
             response.headers['X-Original-Size'] = str(original_size)
             response.headers['X-Compressed-Size'] = str(compressed_size)
             return response
         
-        # Open and process image
-        img = Image.open(io.BytesIO(file_content))
-        
-        # Convert RGBA to RGB if saving as JPEG
-        if file_ext.lower() in ['.jpg', '.jpeg'] and img.mode in ('RGBA', 'LA', 'P'):
-            # Create white background for transparency
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        
-        # Compress and save
-        output_buffer = io.BytesIO()
-        
-        save_kwargs = {
-            'format': img.format if img.format else 'JPEG',
-            'quality': quality,
-            'optimize': True
-        }
+        # Open and process image straight from the upload stream; Pillow reads it as it decodes
+        img = Image.open(file.stream)
+        
+        # Only a bound the image actually exceeds counts as a resize
+        resize_requested = resize_requested and (
+            img.width > (max_width or img.width) or img.height > (max_height or img.height))
+        
+        def send_original():
+            file.stream.seek(0)
+            response = send_bytes(file.stream.read(), original_name, f'image/{file_ext[1:]}')
+            response.headers['X-Compression-Ratio'] = "0%"
+            response.headers['X-Message'] = "Original file already optimized"
+            return response
+        
+        # Cheap header-only checks: skip the lossy encode when it can't meaningfully shrink the file
+        near_optimal = False
+        if not force_compression and not resize_requested:
+            if img.format == 'JPEG' and file_ext in JPEG_EXTENSIONS:
+                source_quality = estimate_jpeg_quality(img)
+                if source_quality is not None and source_quality <= quality + JPEG_QUALITY_SKIP_MARGIN:
+                    logger.info(f"JPEG already at quality ~{source_quality}, skipping re-encode")
+                    near_optimal = True
+            elif img.format == 'PNG' and file_ext == '.png':
+                if original_size / (img.width * img.height) < PNG_DENSE_BYTES_PER_PIXEL:
+                    logger.info("PNG already densely packed, skipping re-encode")
+                    near_optimal = True
+        
+        # Lossless paths rework the encoded stream: no pixel decode and no second generation loss
+        compressed_data = None
+        compression_method = "pillow"
+        resized_to = None
+        if not resize_requested and (near_optimal or lossless_requested or file_ext == '.png'):
+            file.stream.seek(0)
+            compressed_data = optimize_losslessly(file.stream.read(), file_ext)
+            if compressed_data is not None:
+                compression_method = "lossless"
+            elif near_optimal:
+                return send_original()
+        
+        if compressed_data is None and PYVIPS_AVAILABLE and file_ext in VIPS_ENCODE_EXTENSIONS:
+            bounds = (max_width or img.width, max_height or img.height) if resize_requested else None
+            try:
+                file.stream.seek(0)
+                compressed_data, (width, height) = encode_with_vips(file.stream.read(), file_ext, quality, bounds)
+                compression_method = "libvips"
+                if resize_requested:
+                    resized_to = f"{width}x{height}"
+            except pyvips.Error as e:
+                logger.warning(f"libvips encode failed, falling back to Pillow: {e}")
+        
+        if compressed_data is None:
+            # Downscale before anything forces a full decode: thumbnail() calls draft() first,
+            # so JPEGs are decoded at 1/2-1/8 scale by libjpeg, then LANCZOS-resized in one call
+            if resize_requested:
+                img.thumbnail((max_width or img.width, max_height or img.height), Image.Resampling.LANCZOS)
+                resized_to = f"{img.width}x{img.height}"
+            
+            # Compress and save; JPEG encoding also mattes transparency onto white
+            output_buffer = io.BytesIO()
+            IMAGE_ENCODERS.get(file_ext, _save_native)(img, output_buffer, quality, png_level)
+            compressed_data = output_buffer.getvalue()
+        
+        if compression_method != "lossless":
+            # Losslessly shrink the encoder's output further (mozjpeg for JPEG, oxipng for resized PNG)
+            compressed_data = optimize_losslessly(compressed_data, file_ext) or compressed_data
         
-        # Format specific optimizations
-        if file_ext.lower() in ['.jpg', '.jpeg']:
-            save_kwargs['progressive'] = True
-        elif file_ext.lower() == '.png':
-            save_kwargs['compress_level'] = 9
-            del save_kwargs['quality']  # PNG doesn't use quality
-        elif file_ext.lower() == '.webp':
-            save_kwargs['method'] = 6  # Better compression
-        
-        img.save(output_buffer, **save_kwargs)
-        compressed_data = output_buffer.getvalue()
         compressed_size = len(compressed_data)
         
         # Calculate compression ratio
         compression_ratio = (1 - compressed_size / original_size) * 100
         
         # Only keep compressed version if it's actually smaller
-        if compressed_size >= original_size and not force_compression:
+        if compressed_size >= original_size and not force_compression and not resize_requested:
             logger.info("Compression didn't reduce file size, returning original")
-            response = send_file(
-                io.BytesIO(file_content),
-                as_attachment=True,
-                download_name=original_name,
-                mimetype=f'image/{file_ext[1:]}'
-            )
-            response.headers['X-Compression-Ratio'] = "0%"
-            response.headers['X-Message'] = "Original file already optimized"
-            return response
+            return send_original()
         
         # Save to cache
-        with open(cached_file, 'wb') as f:
-            f.write(compressed_data)
+        CacheManager.store(cached_file, compressed_data)
         
         # Log compression
         logger.info(f"Successfully compressed {original_name} "
                    f"({compression_ratio:.1f}% reduction: {original_size} -> {compressed_size} bytes)")
         
-        response = send_file(
-            io.BytesIO(compressed_data),
-            as_attachment=True,
-            download_name=output_filename,
-            mimetype=f'image/{file_ext[1:]}'
-        )
+        response = send_bytes(compressed_data, output_filename, f'image/{file_ext[1:]}')
         response.headers['X-Compression-Ratio'] = f"{compression_ratio:.1f}%"
         response.headers['X-Original-Size'] = str(original_size)
         response.headers['X-Compressed-Size'] = str(compressed_size)
+        response.headers['X-Method'] = compression_method
+        if resized_to:
+            response.headers['X-Resized-To'] = resized_to
         
         return response
         
@@ -1761,6 +2688,23 @@ def compress_image():
         logger.error(f"Image compression error: {str(e)}")
         return jsonify({"error": f"Compression failed: {str(e)}"}), 500
 
+def _batch_compress_pdf(input_path, output_path):
+    """Process pool worker: garbage-collect and deflate one PDF for /batch-process"""
+    doc = fitz.open(input_path)
+    try:
+        doc.save(output_path, garbage=4, deflate=True)
+    finally:
+        doc.close()
+    return output_path
+
+def _batch_compress_image(input_path, output_path, file_ext, max_dimension=0):
+    """Process pool worker: recompress one image for /batch-process, fitting it within max_dimension if set"""
+    img = Image.open(input_path)
+    if max_dimension > 0:
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    IMAGE_ENCODERS.get(file_ext, _save_native)(img, output_path, 85)
+    return output_path
+
 @app.route('/batch-process', methods=['POST'])
 @rate_limit('batch_process')
 @enhanced_error_handler
@@ -1776,6 +2720,11 @@ def batch_process():
     
     files = request.files.getlist('files')
     operation = request.form.get('operation', 'auto')  # auto, compress, convert
+    # Validated once up front, so a bad bound is a 400 rather than a failure per file in the ZIP
+    try:
+        max_dimension = positive_int_field('max_dimension', config.IMAGE_MAX_DIMENSION)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     if len(files) > 10:
         return jsonify({"error": "Maximum 10 files allowed in batch"}), 400
@@ -1785,14 +2734,17 @@ def batch_process():
     
     try:
         # Create temporary directory for batch processing
-        batch_id = hashlib.sha256(str(datetime.now()).encode()).hexdigest()[:8]
+        batch_id = secrets.token_hex(4)
         batch_dir = TEMP_DIR / f"batch_{batch_id}"
         batch_dir.mkdir(exist_ok=True)
         
         processed_files = []
         errors = []
+        jobs = {}
+        arcnames = set()
+        pool = get_process_pool()
         
-        for file in files:
+        for index, file in enumerate(files):
             if file.filename == '':
                 continue
                 
@@ -1805,7 +2757,7 @@ def batch_process():
                     if file_ext == '.pdf':
                         # Auto: compress PDF
                         current_op = 'compress'
-                    elif file_ext in ['.jpg', '.jpeg', '.png', '.webp']:
+                    elif file_ext in BATCH_IMAGE_EXTENSIONS:
                         # Auto: compress image
                         current_op = 'compress_image'
                     else:
@@ -1814,52 +2766,34 @@ def batch_process():
                 else:
                     current_op = operation
                 
-                # Process file based on operation
+                # Queue on the shared process pool; files compress in parallel. The upload index
+                # keeps same-named files from overwriting each other's input or output mid-job
+                temp_file = batch_dir / f"{index}_compressed_{original_name}"
+                input_path = batch_dir / f"{index}_input_{original_name}"
+                arcname = f"compressed_{original_name}"
+                duplicate = 2
+                while arcname in arcnames:
+                    arcname = f"compressed_{Path(original_name).stem}_{duplicate}{file_ext}"
+                    duplicate += 1
+                
                 if current_op == 'compress' and file_ext == '.pdf':
-                    # Simple PDF compression for batch
-                    file_content = file.read()
-                    temp_file = batch_dir / f"compressed_{original_name}"
-                    
                     if PYMUPDF_AVAILABLE:
-                        temp_input = batch_dir / f"input_{original_name}"
-                        with open(temp_input, 'wb') as f:
-                            f.write(file_content)
-                        
-                        doc = fitz.open(str(temp_input))
-                        doc.save(str(temp_file), garbage=4, deflate=True)
-                        doc.close()
-                        
-                        processed_files.append(str(temp_file))
-                        temp_input.unlink()
+                        # Spool rather than pass bytes: queued jobs hold their arguments until they run,
+                        # so a 10-file batch would otherwise keep every PDF in memory at once
+                        file.save(str(input_path))
+                        jobs[pool.submit(
+                            _batch_compress_pdf, str(input_path), str(temp_file))] = (original_name, arcname)
+                        arcnames.add(arcname)
                     else:
                         errors.append(f"{original_name}: PDF compression not available")
                 
-                elif current_op == 'compress_image' and file_ext in ['.jpg', '.jpeg', '.png', '.webp']:
-                    # Simple image compression for batch
+                elif current_op == 'compress_image' and file_ext in BATCH_IMAGE_EXTENSIONS:
                     if PIL_AVAILABLE:
-                        file_content = file.read()
-                        import io
-                        
-                        img = Image.open(io.BytesIO(file_content))
-                        temp_file = batch_dir / f"compressed_{original_name}"
-                        
-                        # Convert RGBA to RGB if saving as JPEG
-                        if file_ext.lower() in ['.jpg', '.jpeg'] and img.mode in ('RGBA', 'LA', 'P'):
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode == 'P':
-                                img = img.convert('RGBA')
-                            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                            img = background
-                        
-                        # Save with compression
-                        save_kwargs = {'quality': 85, 'optimize': True}
-                        if file_ext.lower() in ['.jpg', '.jpeg']:
-                            save_kwargs['progressive'] = True
-                        elif file_ext.lower() == '.png':
-                            save_kwargs = {'optimize': True, 'compress_level': 9}
-                        
-                        img.save(str(temp_file), **save_kwargs)
-                        processed_files.append(str(temp_file))
+                        file.save(str(input_path))
+                        jobs[pool.submit(
+                            _batch_compress_image, str(input_path), str(temp_file), file_ext,
+                            max_dimension)] = (original_name, arcname)
+                        arcnames.add(arcname)
                     else:
                         errors.append(f"{original_name}: Image compression not available")
                 
@@ -1869,39 +2803,40 @@ def batch_process():
             except Exception as e:
                 errors.append(f"{file.filename}: {str(e)}")
         
+        pool_broken = False
+        for future in as_completed(jobs):
+            original_name, arcname = jobs[future]
+            try:
+                processed_files.append((future.result(), arcname))
+            except BrokenProcessPool as e:
+                if not pool_broken:
+                    reset_process_pool()
+                    pool_broken = True
+                errors.append(f"{original_name}: {str(e)}")
+            except Exception as e:
+                errors.append(f"{original_name}: {str(e)}")
+        
         if not processed_files:
+            shutil.rmtree(batch_dir, ignore_errors=True)
             return jsonify({
                 "error": "No files were successfully processed",
                 "errors": errors
             }), 400
         
-        # Create ZIP archive
-        zip_filename = f"batch_processed_{batch_id}.zip"
-        zip_path = batch_dir / zip_filename
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in processed_files:
-                file_path_obj = Path(file_path)
-                zipf.write(file_path, file_path_obj.name)
-        
         logger.info(f"Batch processing completed: {len(processed_files)} files processed, {len(errors)} errors")
         
-        @after_this_request
-        def cleanup(response):
-            try:
-                shutil.rmtree(batch_dir)
-            except Exception as e:
-                logger.warning(f"Batch cleanup error: {e}")
-            return response
+        entries = []
+        for file_path, arcname in processed_files:
+            stored = Path(file_path).suffix.lower() in PRECOMPRESSED_EXTENSIONS
+            entries.append((file_path, arcname, zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED))
         
-        response = send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=zip_filename,
-            mimetype='application/zip'
-        )
+        # Stream the archive straight into the response; the batch dir goes once the body is sent
+        zip_filename = f"batch_processed_{batch_id}.zip"
+        response = Response(stream_zip(entries), mimetype='application/zip')
+        response.headers.set('Content-Disposition', 'attachment', filename=zip_filename)
         response.headers['X-Processed-Files'] = str(len(processed_files))
         response.headers['X-Errors'] = str(len(errors))
+        response.call_on_close(lambda: shutil.rmtree(batch_dir, ignore_errors=True))
         
         return response
         
@@ -1935,67 +2870,94 @@ def pdf_merge():
         return jsonify({"error": "Maximum 20 files allowed for merging"}), 400
     
     try:
+        parts = [file for file in files if file.filename and file.filename.lower().endswith('.pdf')]
+        if not parts:
+            return jsonify({"error": "No PDF files found among the uploads"}), 400
+        output_filename = f"merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        
+        # Cache key: per-part digests in upload order (order changes the output)
+        merge_hasher = CacheManager.new_file_hasher()
+        for file in parts:
+            part_hasher = CacheManager.new_file_hasher()
+            while chunk := file.stream.read(UPLOAD_CHUNK_SIZE):
+                part_hasher.update(chunk)
+            file.stream.seek(0)
+            merge_hasher.update(part_hasher.digest())
+        cached_file = CACHE_DIR / f"merge_{merge_hasher.hexdigest()}.pdf"
+        
+        response = send_cache_hit(cached_file, output_filename, 'application/pdf')
+        if response is not None:
+            logger.info(f"Returning cached merge of {len(parts)} PDF files")
+            response.headers['X-Cached'] = 'true'
+            return response
+        
         # Create merged PDF
         merged_doc = fitz.open()
         
-        for file in files:
-            if file.filename == '':
-                continue
-                
-            if not file.filename.lower().endswith('.pdf'):
-                continue
-            
-            # Read file content
-            file_content = file.read()
-            temp_pdf = TEMP_DIR / f"temp_{hash(file_content)}.pdf"
-            
-            with open(temp_pdf, 'wb') as f:
-                f.write(file_content)
-            
-            # Open and merge
-            doc = fitz.open(str(temp_pdf))
-            merged_doc.insert_pdf(doc)
-            doc.close()
-            
-            # Cleanup temp file
-            if temp_pdf.exists():
-                temp_pdf.unlink()
-        
-        # Save merged PDF
-        output_filename = f"merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        output_path = TEMP_DIR / output_filename
+        for file in parts:
+            # Open straight from the upload; the bytes only live until this part is merged
+            doc = fitz.open(stream=file.read(), filetype='pdf')
+            try:
+                merged_doc.insert_pdf(doc)
+            finally:
+                doc.close()
         
-        merged_doc.save(str(output_path))
+        # Serialize in memory; there's no temp file to write, re-read and clean up
+        merged_data = merged_doc.tobytes()
         merged_doc.close()
+        CacheManager.store(cached_file, merged_data)
         
         logger.info(f"Successfully merged {len(files)} PDF files into {output_filename}")
         
-        @after_this_request
-        def cleanup(response):
-            try:
-                if output_path.exists():
-                    output_path.unlink()
-            except Exception as e:
-                logger.warning(f"Cleanup error: {e}")
-            return response
-        
-        return send_file(
-            output_path,
-            as_attachment=True,
-            download_name=output_filename,
-            mimetype='application/pdf'
-        )
+        return send_bytes(merged_data, output_filename, 'application/pdf')
         
     except Exception as e:
         logger.error(f"PDF merge error: {str(e)}")
         return jsonify({"error": f"PDF merging failed: {str(e)}"}), 500
 
+def _split_pdf_ranges(pdf_path, ranges, base_name, linearize=False):
+    """
+    Process pool worker: build one PDF per (start, end) range for /pdf-split.
+    Returns (filename, page_info, data) per range in order; filename is None and
+    data holds the error message when a range fails.
+    """
+    results = []
+    doc = fitz.open(pdf_path)
+    try:
+        for start, end in ranges:
+            if start == end:
+                split_filename = f"{base_name}_page_{start+1}.pdf"
+                page_info = f"page {start+1}"
+            else:
+                split_filename = f"{base_name}_pages_{start+1}-{end+1}.pdf"
+                page_info = f"pages {start+1}-{end+1}"
+            
+            try:
+                # Create new PDF with selected pages, serialized in memory rather than via a temp file
+                new_doc = fitz.open()
+                try:
+                    new_doc.insert_pdf(doc, from_page=start, to_page=end)
+                    data = new_doc.tobytes(
+                        garbage=4,  # Remove unused objects
+                        deflate=True,  # Compress
+                        linear=linearize  # Web-optimize; MuPDF's linearizer roughly doubles save time
+                    )
+                finally:
+                    new_doc.close()
+                results.append((split_filename, page_info, data))
+            except Exception as split_error:
+                results.append((None, page_info, str(split_error)))
+    finally:
+        doc.close()
+    return results
+
 @app.route('/pdf-split', methods=['POST'])
 @enhanced_error_handler
 def pdf_split():
     """
     Split PDF into multiple files by pages
-    Features: Page range splitting, individual page extraction
+    Features: Page range splitting, individual page extraction;
+    parts are web-linearized only when linear=true
     """
     logger.info("PDF split request received")
     
@@ -2005,8 +2967,9 @@ def pdf_split():
         }), 500
     
     # Validate file upload
+    hasher = CacheManager.new_file_hasher()
     try:
-        validate_file_upload(request.files.get('file'), ['.pdf'], max_size_mb=100)
+        validate_file_upload(request.files.get('file'), PDF_EXTENSIONS, max_size_mb=100, hasher=hasher)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     
@@ -2014,16 +2977,13 @@ def pdf_split():
     split_type = request.form.get('type', 'individual')  # individual, range, custom
     page_ranges = request.form.get('ranges', '')  # e.g., "1-3,5,7-9"
     pages_per_split = request.form.get('pages_per_split', '1')  # for bulk splitting
+    linearize = request.form.get('linear', 'false').lower() == 'true'
     
     try:
-        # Read file content
-        file_content = file.read()
-        file_hash = CacheManager.get_file_hash(file_content)
-        
+        # Validation already hashed the upload; save() copies the stream to disk in chunks
+        file_hash = hasher.hexdigest()
         temp_pdf = TEMP_DIR / f"{file_hash}_input.pdf"
-        
-        with open(temp_pdf, 'wb') as f:
-            f.write(file_content)
+        file.save(str(temp_pdf))
         
         doc = fitz.open(str(temp_pdf))
         total_pages = len(doc)
@@ -2107,58 +3067,71 @@ def pdf_split():
         original_name = secure_filename(file.filename)
         base_name = Path(original_name).stem
         zip_filename = f"{base_name}_split_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        zip_path = TEMP_DIR / zip_filename
+        zip_path = TEMP_DIR / f"{secrets.token_hex(4)}_{zip_filename}"  # Same-second splits mustn't share a temp file
         
         split_files = []
+        doc.close()
         
-        # Process each range
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
-            for i, (start, end) in enumerate(ranges):
+        @after_this_request
+        def cleanup(response):
+            try:
+                if temp_pdf.exists():
+                    temp_pdf.unlink()
+                if zip_path.exists():
+                    zip_path.unlink()
+            except Exception as e:
+                logger.warning(f"Cleanup error: {e}")
+            return response
+        
+        # The archive depends on the content, the parsed ranges, the part names and linearization
+        cache_hasher = CacheManager.new_file_hasher()
+        cache_hasher.update(f"{file_hash}|{base_name}|{ranges}|{linearize}".encode())
+        cached_file = CACHE_DIR / f"split_{cache_hasher.hexdigest()}.zip"
+        split_headers = {
+            'X-Total-Pages': str(total_pages),
+            'X-Split-Type': split_type,
+            'X-Linearized': str(linearize).lower()
+        }
+        
+        response = send_cache_hit(cached_file, zip_filename, 'application/zip')
+        if response is not None:
+            logger.info(f"Returning cached split: {zip_filename}")
+            response.headers.update(split_headers)
+            response.headers['X-Split-Count'] = str(len(ranges))  # Only complete splits are cached
+            response.headers['X-Cached'] = 'true'
+            return response
+        
+        # Hand contiguous slices of ranges to the process pool; each worker opens the source once
+        slice_count = min(len(ranges), PROCESS_POOL_WORKERS)
+        slice_size = -(-len(ranges) // slice_count)
+        range_slices = [ranges[i:i + slice_size] for i in range(0, len(ranges), slice_size)]
+        pool = get_process_pool()
+        futures = [pool.submit(_split_pdf_ranges, str(temp_pdf), chunk, base_name, linearize)
+                   for chunk in range_slices]
+        
+        # Split parts are saved with deflate=True, so a second zlib pass gains nothing
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as zipf:
+            for chunk, future in zip(range_slices, futures):
                 try:
-                    # Create new PDF with selected pages
-                    new_doc = fitz.open()
-                    new_doc.insert_pdf(doc, from_page=start, to_page=end)
-                    
-                    # Generate descriptive filename
-                    if start == end:
-                        split_filename = f"{base_name}_page_{start+1}.pdf"
-                        page_info = f"page {start+1}"
-                    else:
-                        split_filename = f"{base_name}_pages_{start+1}-{end+1}.pdf"
-                        page_info = f"pages {start+1}-{end+1}"
-                    
-                    # Save to temporary file
-                    split_path = TEMP_DIR / split_filename
-                    
-                    # Save with optimization
-                    new_doc.save(
-                        str(split_path),
-                        garbage=4,  # Remove unused objects
-                        deflate=True,  # Compress
-                        linear=True  # Optimize for web
-                    )
-                    new_doc.close()
-                    
-                    # Verify file was created successfully
-                    if split_path.exists() and split_path.stat().st_size > 0:
-                        # Add to ZIP
-                        zipf.write(split_path, split_filename)
+                    results = future.result()
+                except BrokenProcessPool:
+                    reset_process_pool()
+                    results = _split_pdf_ranges(str(temp_pdf), chunk, base_name, linearize)
+                
+                # Results come back in range order, so the archive keeps the page order
+                for split_filename, page_info, data in results:
+                    if split_filename is None:
+                        logger.error(f"Error creating split for {page_info}: {data}")
+                    elif data:
+                        zipf.writestr(split_filename, data)
                         split_files.append({
                             "filename": split_filename,
                             "pages": page_info,
-                            "size": split_path.stat().st_size
+                            "size": len(data)
                         })
                         logger.info(f"Created split file: {split_filename} ({page_info})")
-                        
-                        # Cleanup temp split file
-                        split_path.unlink()
                     else:
                         logger.warning(f"Failed to create split file for {page_info}")
-                        
-                except Exception as split_error:
-                    logger.error(f"Error creating split for range {start+1}-{end+1}: {split_error}")
-        
-        doc.close()
         
         # Check if any splits were successful
         if not split_files:
@@ -2170,28 +3143,20 @@ def pdf_split():
         # Log successful split
         logger.info(f"Successfully split PDF: {len(split_files)} files created")
         
-        @after_this_request
-        def cleanup(response):
-            try:
-                if temp_pdf.exists():
-                    temp_pdf.unlink()
-                if zip_path.exists():
-                    zip_path.unlink()
-            except Exception as e:
-                logger.warning(f"Cleanup error: {e}")
-            return response
-        
-        # Prepare response with metadata
-        response = send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=zip_filename,
-            mimetype='application/zip'
-        )
+        # Prepare response with metadata; a split with a failed range isn't cached so it can be retried
+        if len(split_files) == len(ranges):
+            CacheManager.adopt(zip_path, cached_file)
+            response = send_cached_file(cached_file, zip_filename, 'application/zip')
+        else:
+            response = send_file(
+                zip_path,
+                as_attachment=True,
+                download_name=zip_filename,
+                mimetype='application/zip'
+            )
         
-        response.headers['X-Total-Pages'] = str(total_pages)
+        response.headers.update(split_headers)
         response.headers['X-Split-Count'] = str(len(split_files))
-        response.headers['X-Split-Type'] = split_type
         
         return response
         